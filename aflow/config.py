@@ -1,24 +1,57 @@
 import os
+import functools
+from types import MappingProxyType
 from dotenv import load_dotenv
 
+_LOADED = False
+
+def _load_dotenv_once():
+    """Parse the .env file only on first use"""
+    global _LOADED
+    if not _LOADED:
+        load_dotenv()
+        _LOADED = True
+
+def _env_flag(name):
+    """Read a boolean environment variable, or None if it is not set"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+@functools.lru_cache(maxsize=1)
 def load_config():
-    """Load configuration from .env file"""
-    load_dotenv()
-    
-    return {
+    """Load configuration from .env file
+
+    The result is computed once per process and returned as a read-only
+    mapping; call ``load_config.cache_clear()`` to pick up environment changes.
+    """
+    _load_dotenv_once()
+
+    return MappingProxyType({
         # Neo4j configuration
-        'neo4j': {
+        'neo4j': MappingProxyType({
             'uri': os.getenv('NEO4J_URI', 'neo4j://localhost:7687'),
             'user': os.getenv('NEO4J_USER', 'neo4j'),
             'password': os.getenv('NEO4J_PASSWORD'),
-            'database': os.getenv('NEO4J_DATABASE', 'neo4j')
-        },
+            'database': os.getenv('NEO4J_DATABASE', 'neo4j'),
+            # Driver connection pool settings
+            'max_connection_pool_size': int(os.getenv('NEO4J_MAX_CONNECTION_POOL_SIZE', '50')),
+            'connection_acquisition_timeout': float(os.getenv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', '60'))
+        }),
         # Embedder configuration
-        'embedder': {
+        'embedder': MappingProxyType({
             'api_key': os.getenv('EMBEDDER_API_KEY', 'ollama'),
             'base_url': os.getenv('EMBEDDER_BASE_URL', 'https://api.openai.com/v1'),
-            'model': os.getenv('EMBEDDER_MODEL', 'text-embedding-ada-002')
-        },
+            'model': os.getenv('EMBEDDER_MODEL', 'text-embedding-ada-002'),
+            # Vector index settings; must match the embedding model's output
+            'dimensions': int(os.getenv('EMBEDDER_DIMENSIONS', '1536')),
+            'similarity_function': os.getenv('EMBEDDER_SIMILARITY', 'cosine'),
+            # Unset keeps the server's default for vector index quantization
+            'quantization': _env_flag('EMBEDDER_QUANTIZATION'),
+            # Optional on-disk embedding cache directory (requires diskcache)
+            'cache_dir': os.getenv('EMBEDDER_CACHE_DIR')
+        }),
         # Tools directory
         'tools_dir': os.getenv('TOOLS_DIR', 'aflow/tools')
-    }
+    })
@@ -1,46 +1,178 @@
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Vector index name -> (variable, label)
+VECTOR_INDEXES = {
+    'workflowEmbedding': ('w', 'Workflow'),
+    'taskEmbedding': ('t', 'Task'),
+    'toolEmbedding': ('t', 'Tool'),
+}
+
+# Fulltext index name -> (variable, label)
+FULLTEXT_INDEXES = {
+    'workflowFulltext': ('w', 'Workflow'),
+    'taskFulltext': ('t', 'Task'),
+    'toolFulltext': ('t', 'Tool'),
+}
+
+# Uniqueness constraint name -> (variable, label, property); each constraint
+# is backed by an index of the same name, which serves name lookups
+UNIQUE_CONSTRAINTS = {
+    'toolName': ('t', 'Tool', 'name'),
+    'taskName': ('t', 'Task', 'name'),
+    'fileLeafPath': ('l', 'FileLeaf', 'path'),
+}
+
+
+# Relationship property index name -> (variable, relationship type, property)
+RELATIONSHIP_INDEXES = {
+    'usesOrder': ('r', 'USES', 'order'),
+}
+
+
+def vector_index_config(dimensions: int = 1536, similarity_function: str = 'cosine',
+                        quantization: Optional[bool] = None) -> dict:
+    """Build the vector index configuration, keyed by index option name
+
+    Args:
+        dimensions: Embedding vector dimensions
+        similarity_function: Vector similarity function ('cosine' or 'euclidean')
+        quantization: Enable or disable vector index quantization (Neo4j 5.23+);
+            None leaves the option out and keeps the server default
+    """
+    dimensions = int(dimensions)
+    if similarity_function not in ('cosine', 'euclidean'):
+        raise ValueError(f"Unsupported vector similarity function: {similarity_function}")
+
+    config = {
+        'vector.dimensions': dimensions,
+        'vector.similarity_function': similarity_function,
+    }
+    if quantization is not None:
+        config['vector.quantization.enabled'] = bool(quantization)
+    return config
+
+
+def _cypher_literal(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return f"'{value}'"
+    return str(value)
+
+
+def build_index_queries(dimensions: int = 1536, similarity_function: str = 'cosine',
+                        quantization: Optional[bool] = None) -> dict:
+    """Build the index and constraint DDL keyed by name
+
+    Index options cannot be passed as query parameters, so the values are
+    validated and formatted into the statements.
+
+    Args:
+        dimensions: Embedding vector dimensions
+        similarity_function: Vector similarity function ('cosine' or 'euclidean')
+        quantization: Enable or disable vector index quantization (Neo4j 5.23+);
+            None leaves the option out and keeps the server default
+    """
+    config = vector_index_config(dimensions, similarity_function, quantization)
+    index_config = ",\n            ".join(f"`{key}`: {_cypher_literal(value)}" for key, value in config.items())
+
+    queries = {}
+    for name, (var, label) in VECTOR_INDEXES.items():
+        queries[name] = f"""
+        CREATE VECTOR INDEX {name} IF NOT EXISTS
+        FOR ({var}:{label}) ON ({var}.embedding)
+        OPTIONS {{indexConfig: {{
+            {index_config}
+        }}}}
+    """
+    for name, (var, label) in FULLTEXT_INDEXES.items():
+        queries[name] = f"""
+        CREATE FULLTEXT INDEX {name} IF NOT EXISTS
+        FOR ({var}:{label}) ON EACH [{var}.name, {var}.description]
+    """
+    for name, (var, label, prop) in UNIQUE_CONSTRAINTS.items():
+        queries[name] = f"""
+        CREATE CONSTRAINT {name} IF NOT EXISTS
+        FOR ({var}:{label}) REQUIRE {var}.{prop} IS UNIQUE
+    """
+    for name, (var, rel_type, prop) in RELATIONSHIP_INDEXES.items():
+        queries[name] = f"""
+        CREATE INDEX {name} IF NOT EXISTS
+        FOR ()-[{var}:{rel_type}]-() ON ({var}.{prop})
+    """
+    return queries
+
+
+INDEX_QUERIES = build_index_queries()
+
+
 class IndexManager:
-    def __init__(self, neo4j_manager):
+    def __init__(self, neo4j_manager, embedder_config=None):
+        """Initialize index manager
+
+        Args:
+            neo4j_manager: Neo4j database manager
+            embedder_config: Embedder configuration; its dimensions,
+                similarity_function and quantization keys shape the vector indexes
+        """
         self.neo4j_manager = neo4j_manager
+        embedder_config = embedder_config or {}
+        self.vector_config = vector_index_config(
+            dimensions=embedder_config.get('dimensions', 1536),
+            similarity_function=embedder_config.get('similarity_function', 'cosine'),
+            quantization=embedder_config.get('quantization')
+        )
+        self.index_queries = build_index_queries(
+            dimensions=self.vector_config['vector.dimensions'],
+            similarity_function=self.vector_config['vector.similarity_function'],
+            quantization=self.vector_config.get('vector.quantization.enabled')
+        )
 
     def init_indexes(self):
-        """Initialize database indexes"""
+        """Initialize database indexes and constraints
+
+        Only indexes missing from SHOW INDEXES are created, all in a single
+        write transaction; nothing is sent when every index already exists.
+        Existing vector indexes whose options differ from the configuration
+        are reported, since CREATE ... IF NOT EXISTS leaves them unchanged.
+        """
         with self.neo4j_manager.get_session() as session:
-            # Create vector indexes
-            session.run("""
-                CREATE VECTOR INDEX workflowEmbedding IF NOT EXISTS
-                FOR (w:Workflow) ON (w.embedding)
-                OPTIONS {indexConfig: {
-                    `vector.dimensions`: 1536,
-                    `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            session.run("""
-                CREATE VECTOR INDEX taskEmbedding IF NOT EXISTS
-                FOR (t:Task) ON (t.embedding)
-                OPTIONS {indexConfig: {
-                    `vector.dimensions`: 1536,
-                    `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            session.run("""
-                CREATE VECTOR INDEX toolEmbedding IF NOT EXISTS
-                FOR (t:Tool) ON (t.embedding)
-                OPTIONS {indexConfig: {
-                    `vector.dimensions`: 1536,
-                    `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            
-            # Create fulltext indexes
-            session.run("""
-                CREATE FULLTEXT INDEX workflowFulltext IF NOT EXISTS
-                FOR (w:Workflow) ON EACH [w.name, w.description]
-            """)
-            session.run("""
-                CREATE FULLTEXT INDEX taskFulltext IF NOT EXISTS
-                FOR (t:Task) ON EACH [t.name, t.description]
-            """)
-            session.run("""
-                CREATE FULLTEXT INDEX toolFulltext IF NOT EXISTS
-                FOR (t:Tool) ON EACH [t.name, t.description]
-            """)
+            existing = {record["name"]: record["options"]
+                        for record in session.run("SHOW INDEXES YIELD name, options")}
+            for name in VECTOR_INDEXES:
+                if name in existing:
+                    self._check_vector_index(name, existing[name])
+
+            missing = [query for name, query in self.index_queries.items() if name not in existing]
+            if not missing:
+                return
+
+            session.execute_write(lambda tx: [tx.run(query).consume() for query in missing])
+
+    def _check_vector_index(self, name: str, options: Optional[dict]):
+        """Warn when an existing vector index was created with other options
+
+        Args:
+            name: Vector index name
+            options: Index options reported by SHOW INDEXES
+        """
+        index_config = (options or {}).get('indexConfig') or {}
+        mismatches = []
+        for key, expected in self.vector_config.items():
+            # Options unknown to the server (e.g. quantization before 5.23) are not reported
+            if key not in index_config:
+                continue
+            actual = index_config[key]
+            if isinstance(expected, str) and isinstance(actual, str):
+                matches = actual.lower() == expected.lower()
+            else:
+                matches = actual == expected
+            if not matches:
+                mismatches.append(f"{key} is {actual!r}, configured {expected!r}")
+        if mismatches:
+            logger.warning("Vector index %s does not match the embedder configuration (%s); "
+                           "drop the index to recreate it with the configured options",
+                           name, "; ".join(mismatches))
@@ -1,23 +1,141 @@
-import os
-from neo4j import GraphDatabase
+import hashlib
+import threading
+from contextlib import contextmanager
+from neo4j import GraphDatabase, READ_ACCESS
+from ..config import load_config
+
+# Drivers shared between manager instances, keyed by connection target,
+# credentials and driver settings. Each entry holds [driver, refcount] so the connection pool is only closed
+# once the last manager using it is closed.
+_DRIVER_CACHE = {}
+_DRIVER_LOCK = threading.Lock()
 
 class Neo4jManager:
-    def __init__(self, uri: str = None, user: str = None, password: str = None, database: str = "neo4j"):
-        """Initialize Neo4j database connection manager"""
-        uri = uri or os.getenv("NEO4J_URI", "neo4j://localhost:7687")
-        user = user or os.getenv("NEO4J_USER", "neo4j")
-        password = password or os.getenv("NEO4J_PASSWORD")
-        
+    def __init__(self, uri: str = None, user: str = None, password: str = None, database: str = "neo4j",
+                 max_connection_pool_size: int = 50, connection_acquisition_timeout: float = 60,
+                 max_connection_lifetime: float = 3600):
+        """Initialize Neo4j database connection manager
+
+        Managers created with the same uri, credentials and driver settings
+        share a single driver (and therefore a single connection pool); the
+        database is selected per session, so it does not need its own driver.
+        """
+        neo4j_config = load_config()['neo4j']
+        uri = uri or neo4j_config['uri']
+        user = user or neo4j_config['user']
+        password = password or neo4j_config['password']
+
         if not password:
             raise ValueError("Neo4j password must be provided either through constructor or NEO4J_PASSWORD environment variable")
-            
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+
+        # The password is keyed by digest so managers with other credentials
+        # never reuse an authenticated driver, and the plain text is not kept
+        self._driver_key = (
+            uri, user, hashlib.sha256(password.encode()).hexdigest(),
+            max_connection_pool_size, connection_acquisition_timeout, max_connection_lifetime
+        )
+        with _DRIVER_LOCK:
+            entry = _DRIVER_CACHE.get(self._driver_key)
+            if entry is None:
+                driver = GraphDatabase.driver(
+                    uri,
+                    auth=(user, password),
+                    max_connection_pool_size=max_connection_pool_size,
+                    connection_acquisition_timeout=connection_acquisition_timeout,
+                    max_connection_lifetime=max_connection_lifetime
+                )
+                entry = _DRIVER_CACHE[self._driver_key] = [driver, 0]
+            entry[1] += 1
+
+        self.driver = entry[0]
         self.database = database
+        self._closed = False
+        # Session held by session_scope() for the current thread, if any
+        self._local = threading.local()
 
     def get_session(self):
         """Get a new database session"""
         return self.driver.session(database=self.database)
 
+    def get_read_session(self):
+        """Get a new read-only session, routable to cluster followers"""
+        return self.driver.session(database=self.database, default_access_mode=READ_ACCESS)
+
+    @contextmanager
+    def session_scope(self):
+        """Hold one session for every run_read/run_write in this thread
+
+        Queries issued inside the block reuse the held session instead of
+        acquiring a connection per call; each still runs in its own managed
+        transaction. Nested scopes share the outermost session.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            yield session
+            return
+
+        with self.driver.session(database=self.database) as session:
+            self._local.session = session
+            try:
+                yield session
+            finally:
+                self._local.session = None
+
+    def run_read(self, query: str, **params) -> list:
+        """Run a read-only query in a managed read transaction
+
+        The session is opened in READ mode so the driver can route it to a
+        follower, and transient failures are retried by the driver.
+
+        Returns:
+            List of result records
+        """
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            return session.execute_read(lambda tx: list(tx.run(query, params)))
+        with self.get_read_session() as session:
+            return session.execute_read(lambda tx: list(tx.run(query, params)))
+
+    def iter_read(self, query: str, **params):
+        """Stream the records of a read-only query
+
+        Records are yielded as the driver fetches them instead of being
+        collected first, so large results are not held in memory and callers
+        can stop early. Unlike run_read, the query runs in an auto-commit
+        transaction and is not retried. It always uses its own read session,
+        since auto-commit queries on a held session would go to the leader.
+
+        Yields:
+            Result records
+        """
+        with self.get_read_session() as session:
+            yield from session.run(query, params)
+
+    def run_write(self, query: str, **params) -> list:
+        """Run a query in a managed write transaction
+
+        Returns:
+            List of result records
+        """
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            return session.execute_write(lambda tx: list(tx.run(query, params)))
+        with self.driver.session(database=self.database) as session:
+            return session.execute_write(lambda tx: list(tx.run(query, params)))
+
     def close(self):
-        """Close the database connection"""
+        """Release the shared driver, closing it once no manager uses it"""
+        with _DRIVER_LOCK:
+            if self._closed:
+                return
+            self._closed = True
+
+            entry = _DRIVER_CACHE.get(self._driver_key)
+            if entry is None or entry[0] is not self.driver:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del _DRIVER_CACHE[self._driver_key]
+
         self.driver.close()
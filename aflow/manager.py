@@ -1,42 +1,93 @@
 from typing import Dict, List, Union, Any
 from .database import Neo4jManager, IndexManager
 from .retrieval import RetrieverManager
-from .models import ToolManager, TaskManager, WorkflowManager
+from .models import ToolManager, TaskManager, AsyncTaskManager, WorkflowManager
+from .models.tool_manager import DEFAULT_CATEGORY
 from .config import load_config
 
+# Connection targets whose indexes have already been initialized in this process
+_INDEXED_TARGETS = set()
+
 class AflowManager:
     def __init__(self):
-        """Initialize workflow manager using configuration from .env file"""
+        """Initialize workflow manager using configuration from .env file
+
+        Only the database connection is set up eagerly; the retriever and
+        model managers are created on first use.
+        """
         # Load configuration
-        config = load_config()
+        self._config = load_config()
+        neo4j_config = self._config['neo4j']
         
         # Initialize database connection
         self.neo4j_manager = Neo4jManager(
-            uri=config['neo4j']['uri'],
-            user=config['neo4j']['user'],
-            password=config['neo4j']['password'],
-            database=config['neo4j']['database']
+            uri=neo4j_config['uri'],
+            user=neo4j_config['user'],
+            password=neo4j_config['password'],
+            database=neo4j_config['database'],
+            max_connection_pool_size=neo4j_config['max_connection_pool_size'],
+            connection_acquisition_timeout=neo4j_config['connection_acquisition_timeout']
         )
         
-        # Initialize index manager and create indexes
-        self.index_manager = IndexManager(self.neo4j_manager)
-        self.index_manager.init_indexes()
-        
-        # Initialize retriever manager
-        self.retriever_manager = RetrieverManager(
-            neo4j_manager=self.neo4j_manager,
-            embedder_config=config['embedder']
-        )
+        # Initialize index manager and create indexes once per connection target
+        self.index_manager = IndexManager(self.neo4j_manager, self._config['embedder'])
+        target = (neo4j_config['uri'], neo4j_config['user'], neo4j_config['database'])
+        if target not in _INDEXED_TARGETS:
+            self.index_manager.init_indexes()
+            _INDEXED_TARGETS.add(target)
         
-        # Initialize model managers
-        self.tool_manager = ToolManager(self.neo4j_manager, self.retriever_manager, config['tools_dir'])
-        self.task_manager = TaskManager(self.neo4j_manager, self.retriever_manager, self.tool_manager)
-        self.workflow_manager = WorkflowManager(self.neo4j_manager, self.retriever_manager, self.task_manager)
-
-    def create_tool(self, name: str, description: str, category: str = 'uncategorized') -> Dict:
+        self._retriever_manager = None
+        self._tool_manager = None
+        self._task_manager = None
+        self._async_task_manager = None
+        self._workflow_manager = None
+
+    @property
+    def retriever_manager(self) -> RetrieverManager:
+        """Retriever manager, created on first access"""
+        if self._retriever_manager is None:
+            self._retriever_manager = RetrieverManager(
+                neo4j_manager=self.neo4j_manager,
+                embedder_config=self._config['embedder']
+            )
+        return self._retriever_manager
+
+    @property
+    def tool_manager(self) -> ToolManager:
+        """Tool manager, created (and the tools directory scanned) on first access"""
+        if self._tool_manager is None:
+            self._tool_manager = ToolManager(self.neo4j_manager, self.retriever_manager, self._config['tools_dir'])
+        return self._tool_manager
+
+    @property
+    def task_manager(self) -> TaskManager:
+        """Task manager, created on first access"""
+        if self._task_manager is None:
+            self._task_manager = TaskManager(self.neo4j_manager, self.retriever_manager, self.tool_manager)
+        return self._task_manager
+
+    @property
+    def async_task_manager(self) -> AsyncTaskManager:
+        """Awaitable task manager sharing the task manager's connections"""
+        if self._async_task_manager is None:
+            self._async_task_manager = AsyncTaskManager(self.task_manager)
+        return self._async_task_manager
+
+    @property
+    def workflow_manager(self) -> WorkflowManager:
+        """Workflow manager, created on first access"""
+        if self._workflow_manager is None:
+            self._workflow_manager = WorkflowManager(self.neo4j_manager, self.retriever_manager, self.task_manager)
+        return self._workflow_manager
+
+    def create_tool(self, name: str, description: str, category: str = DEFAULT_CATEGORY) -> Dict:
         """Create a new tool or return existing one"""
         return self.tool_manager.create_tool(name, description, category)
 
+    def create_tools_bulk(self, tools: List[Dict]) -> List[Dict]:
+        """Create several tools in one batch"""
+        return self.tool_manager.create_tools_bulk(tools)
+
     def update_tool(self, name: str, description: str = None, category: str = None) -> Dict:
         """Update existing tool properties"""
         return self.tool_manager.update_tool(name, description, category)
@@ -58,25 +109,32 @@ class AflowManager:
         return self.tool_manager.sync_tools()
 
 
-    def create_task(self, name: str, description: str, tool_names: List[str], input_params: List[str], output_params: List[str]) -> Dict:
+    def create_task(self, name: str, description: str, tool_names: List[str], input_params: List[str], output_params: List[str],
+                    tool_outputs: Dict[str, List[str]] = None) -> Dict:
         """Create a new task and associate with tool"""
-        return self.task_manager.create_task(name, description, tool_names, input_params, output_params)
+        return self.task_manager.create_task(name, description, tool_names, input_params, output_params, tool_outputs)
+
+    def create_tasks_bulk(self, tasks: List[Dict]) -> List[Dict]:
+        """Create several tasks in one batch"""
+        return self.task_manager.create_tasks_bulk(tasks)
 
-    def update_task(self, name: str, description: str = None, tool_names: List[str] = None, input_params: List[str] = None, output_params: List[str] = None) -> Dict:
+    def update_task(self, name: str, description: str = None, tool_names: List[str] = None, input_params: List[str] = None, output_params: List[str] = None,
+                    tool_outputs: Dict[str, List[str]] = None) -> Dict:
         """Update existing task properties and tool association"""
-        return self.task_manager.update_task(name, description, tool_names, input_params, output_params)
+        return self.task_manager.update_task(name, description, tool_names, input_params, output_params, tool_outputs)
 
-    def execute_task(self, task_name: str, context_variables: Dict[str, Any] = None) -> Dict[str, Any]:
+    def execute_task(self, task_name: str, context_variables: Dict[str, Any] = None,
+                     concurrent: bool = False) -> Dict[str, Any]:
         """Execute task with given parameters"""
-        return self.task_manager.execute_task(task_name, context_variables)
+        return self.task_manager.execute_task(task_name, context_variables, concurrent)
 
     def get_task(self, task_name: str) -> Dict:
         """Get task details"""
         return self.task_manager.get_task(task_name)
 
-    def list_tasks(self) -> list:
+    def list_tasks(self, include_embedding: bool = False) -> list:
         """List all tasks"""
-        return self.task_manager.list_tasks()
+        return self.task_manager.list_tasks(include_embedding)
 
     def delete_task(self, task_name: str):
         """Delete unused task"""
@@ -1,3 +1,3 @@
 from .tool_manager import ToolManager
-from .task_manager import TaskManager
+from .task_manager import TaskManager, AsyncTaskManager
 from .workflow_manager import WorkflowManager
@@ -1,306 +1,647 @@
 import os
+import re
+import io
+import sys
 import json
+import mmap
+import logging
+import threading
 import hashlib
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass
+import functools
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from collections import deque
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import ast
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# 哈希仅用于变化检测，不需要抗碰撞攻击：优先使用SIMD加速的BLAKE3，
+# 未安装时回退到标准库中比SHA-256更快的BLAKE2b（128位摘要足以检测变化）
+try:
+    from blake3 import blake3 as _hasher
+    HASH_ALGORITHM = 'blake3'
+except ImportError:
+    _hasher = functools.partial(hashlib.blake2b, digest_size=16)
+    HASH_ALGORITHM = 'blake2b-128'
+
+# 保存状态的版本标记：哈希算法或函数提取规则（_iter_function_defs）变化时需要改变，
+# 版本不一致时已保存的文件节点会被重新计算哈希并重新解析
+STATE_VERSION = f"{HASH_ALGORITHM}/2"
+
+# 超过该大小的文件使用mmap计算哈希，其余文件一次读入
+MMAP_THRESHOLD = 1 << 20
+# 并行计算文件哈希的线程数
+HASH_WORKERS = (os.cpu_count() or 1) * 2
+# 每个线程任务最多批量构建的文件数，减少大量小文件时的任务调度开销
+HASH_BATCH_SIZE = 64
+# 需要构建的文件少于该数量时直接在当前线程构建，避免线程池开销
+PARALLEL_THRESHOLD = 8
+# 按文件内容哈希缓存的函数提取结果数量上限
+FUNCTION_CACHE_SIZE = 4096
+# 快速判断文件中是否可能存在函数定义；误判为存在时只是照常解析
+_DEF_PATTERN = re.compile(r'\bdef\b')
+# 函数节点共享的只读空子节点映射，避免为每个函数节点分配空字典
+EMPTY_CHILDREN = MappingProxyType({})
+
+@dataclass(slots=True)
 class MerkleNode:
     """Merkle树节点，用于表示文件、目录或函数
     
     Attributes:
-        hash: 节点的哈希值
+        hash: 节点的哈希值（原始摘要字节）
         path: 节点的路径（对于函数，是文件路径加函数名）
         children: 子节点字典，key为名称，value为MerkleNode
         is_file: 是否为文件
         is_function: 是否为函数
-        content_hash: 内容的哈希值
+        content_hash: 内容的哈希值（原始摘要字节）
         function_name: 函数名（仅对函数节点有效）
         function_doc: 函数文档（仅对函数节点有效）
+        mtime_ns: 文件的修改时间（纳秒，仅对文件节点有效）
+        size: 文件大小（仅对文件节点有效）
     """
-    hash: str
+    hash: bytes
     path: str
     children: Dict[str, 'MerkleNode']
     is_file: bool
     is_function: bool = False
-    content_hash: Optional[str] = None
+    content_hash: Optional[bytes] = None
     function_name: Optional[str] = None
     function_doc: Optional[str] = None
+    mtime_ns: Optional[int] = None
+    size: Optional[int] = None
 
 class MerkleTree:
-    def __init__(self, root_dir: str):
+    def __init__(self, root_dir: str, build: bool = True):
         """初始化Merkle Tree
         
         Args:
             root_dir: 根目录路径
+            build: 是否立即构建树；随后要加载已保存状态时传入False，
+                   由第一次update()按保存的mtime/size只对变化的文件计算哈希
         """
         self.root_dir = root_dir
-        self.root = self._build_tree(root_dir)
+        # 文件内容哈希 -> ((函数名, 函数哈希, 函数文档), ...)，内容未变的文件无需重新解析
+        self._func_cache = {}
+        self._func_cache_lock = threading.Lock()
+        self.root = self._build_tree(root_dir) if build else None
         self.previous_root = None
         self.changed_functions = {}  # 记录每个文件中发生变化的函数
     
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件的SHA-256哈希值
+    def _calculate_file_hash(self, file_path: str) -> bytes:
+        """计算文件的哈希值（BLAKE3或BLAKE2b）
         
         Args:
             file_path: 文件路径
-            
+
         Returns:
-            str: 文件的SHA-256哈希值
+            bytes: 文件的摘要
         """
-        sha256_hash = hashlib.sha256()
         try:
             with open(file_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
-        except Exception as e:
-            print(f"Error calculating hash for {file_path}: {e}")
-            return ""
+                # 大文件通过mmap一次性交给hashlib，避免Python层的分块循环
+                if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if HASH_ALGORITHM == 'blake3':
+                            # BLAKE3的树结构支持对单个大文件多线程计算
+                            return _hasher(mm, max_threads=_hasher.AUTO).digest()
+                        return _hasher(mm).digest()
+                # 小文件一次读入，整体计算哈希
+                return _hasher(f.read()).digest()
+        except (OSError, ValueError) as e:
+            # ValueError: 文件在fstat之后被截断为空，mmap失败
+            logger.warning("Error calculating hash for %s: %s", file_path, e)
+            return b""
 
-    def _calculate_function_hash(self, source: str) -> str:
+    def _calculate_function_hash(self, source: str) -> bytes:
         """计算函数代码的哈希值
         
         Args:
             source: 函数的源代码
-            
+
         Returns:
-            str: 函数代码的SHA-256哈希值
+            bytes: 函数代码的摘要
         """
-        return hashlib.sha256(source.encode()).hexdigest()
+        return _hasher(source.encode()).digest()
 
     def _extract_functions(self, file_path: str) -> List[MerkleNode]:
         """从Python文件中提取函数节点
         
         Args:
             file_path: Python文件路径
-            
+
         Returns:
             List[MerkleNode]: 函数节点列表
         """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                tree = ast.parse(content)
+            # 不含def关键字的文件（如__init__.py、常量模块）不可能定义函数，无需构建AST
+            if not _DEF_PATTERN.search(content):
+                return []
+            tree = compile(content, file_path, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+            # 按与ast相同的规则（\n、\r\n、\r）切分行，只切分一次
+            lines = io.StringIO(content, newline='').readlines()
 
             functions = []
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    if node.name.startswith('_'):
-                        continue
-                    
-                    print(f"Found function: {node.name}")
-                    # 获取函数源代码
-                    func_source = ast.get_source_segment(content, node)
-                    if not func_source:
-                        print(f"Could not get source for function: {node.name}")
-                        continue
+            for node in self._iter_function_defs(tree):
+                if node.name.startswith('_'):
+                    continue
+
+                logger.debug("Found function: %s", node.name)
+                # 获取函数源代码（直接切片，避免get_source_segment每次重新切分整个文件）
+                func_source = self._source_segment(lines, node)
+                if not func_source:
+                    logger.debug("Could not get source for function: %s", node.name)
+                    continue
+
+                # 计算函数哈希值
+                func_hash = self._calculate_function_hash(func_source)
+
+                # 获取函数文档
+                func_doc = ast.get_docstring(node)
+
+                # 创建函数节点
+                func_node = MerkleNode(
+                    hash=func_hash,
+                    path=f"{file_path}::{node.name}",
+                    children=EMPTY_CHILDREN,
+                    is_file=False,
+                    is_function=True,
+                    content_hash=func_hash,
+                    function_name=node.name,
+                    function_doc=func_doc
+                )
+                functions.append(func_node)
 
-                    # 计算函数哈希值
-                    func_hash = self._calculate_function_hash(func_source)
-                    
-                    # 获取函数文档
-                    func_doc = ast.get_docstring(node)
-                    
-                    # 创建函数节点
-                    func_node = MerkleNode(
-                        hash=func_hash,
-                        path=f"{file_path}::{node.name}",
-                        children={},
-                        is_file=False,
-                        is_function=True,
-                        content_hash=func_hash,
-                        function_name=node.name,
-                        function_doc=func_doc
-                    )
-                    functions.append(func_node)
-            
             return functions
         except Exception as e:
-            print(f"Error extracting functions from {file_path}: {e}")
+            logger.warning("Error extracting functions from %s: %s", file_path, e)
             return []
 
-    def _build_tree(self, path: str) -> MerkleNode:
-        """递归构建目录的Merkle树
-        
+    @staticmethod
+    def _iter_function_defs(tree: ast.Module) -> Iterator[ast.FunctionDef]:
+        """按广度优先顺序遍历模块和类定义体中的函数定义
+
+        同时进入模块级的if/try/with/for等复合语句的各个语句块（如
+        try: import x / except ImportError: def tool(...)），
+        但不遍历函数体内部的表达式和嵌套函数。
+
         Args:
-            path: 当前处理的路径
-            
+            tree: 模块的AST
+
+        Yields:
+            ast.FunctionDef: 函数定义节点
+        """
+        queue = deque([tree.body])
+        while queue:
+            for child in queue.popleft():
+                if isinstance(child, ast.FunctionDef):
+                    yield child
+                elif isinstance(child, ast.ClassDef):
+                    queue.append(child.body)
+                elif not isinstance(child, ast.AsyncFunctionDef):
+                    for field in ('body', 'orelse', 'finalbody'):
+                        block = getattr(child, field, None)
+                        if isinstance(block, list):
+                            queue.append(block)
+                    # except子句和match分支各自带有语句块
+                    for clause in chain(getattr(child, 'handlers', ()), getattr(child, 'cases', ())):
+                        queue.append(clause.body)
+
+    @staticmethod
+    def _source_segment(lines: List[str], node: ast.AST) -> Optional[str]:
+        """按节点的位置信息从已切分的源代码行中截取源代码
+
+        结果与ast.get_source_segment一致，列偏移量按UTF-8字节计算。
+
+        Args:
+            lines: 保留行尾的源代码行
+            node: 带有位置信息的AST节点
+
         Returns:
-            MerkleNode: 构建的Merkle树节点
+            Optional[str]: 节点的源代码，缺少位置信息时返回None
+        """
+        if node.end_lineno is None or node.end_col_offset is None:
+            return None
+        first, last = node.lineno - 1, node.end_lineno - 1
+        if first == last:
+            return lines[first].encode()[node.col_offset:node.end_col_offset].decode()
+        head = lines[first].encode()[node.col_offset:].decode()
+        tail = lines[last].encode()[:node.end_col_offset].decode()
+        return ''.join([head, *lines[first + 1:last], tail])
+
+    def _get_functions(self, path: str, content_hash: bytes) -> List[MerkleNode]:
+        """获取文件的函数节点，内容哈希命中缓存时不再解析文件
+
+        Args:
+            path: Python文件路径
+            content_hash: 文件内容哈希
+
+        Returns:
+            List[MerkleNode]: 函数节点列表
+        """
+        entries = self._func_cache.get(content_hash)
+        if entries is not None:
+            return [
+                MerkleNode(
+                    hash=func_hash,
+                    path=f"{path}::{name}",
+                    children=EMPTY_CHILDREN,
+                    is_file=False,
+                    is_function=True,
+                    content_hash=func_hash,
+                    function_name=name,
+                    function_doc=doc
+                )
+                for name, func_hash, doc in entries
+            ]
+
+        func_nodes = self._extract_functions(path)
+        if content_hash:
+            self._cache_functions(content_hash, func_nodes)
+        return func_nodes
+
+    def _cache_functions(self, content_hash: bytes, func_nodes):
+        """记录文件内容哈希对应的函数，超过上限时淘汰最早加入的条目
+
+        Args:
+            content_hash: 文件内容哈希
+            func_nodes: 该文件的函数节点
+        """
+        entries = tuple((node.function_name, node.hash, node.function_doc) for node in func_nodes)
+        with self._func_cache_lock:
+            self._func_cache[content_hash] = entries
+            while len(self._func_cache) > FUNCTION_CACHE_SIZE:
+                del self._func_cache[next(iter(self._func_cache))]
+
+    def _build_file_node(self, path: str, content_hash: Optional[bytes] = None) -> MerkleNode:
+        """构建单个文件的Merkle节点
+
+        Args:
+            path: 文件路径
+            content_hash: 预先计算好的文件哈希值，为None时现场计算
+
+        Returns:
+            MerkleNode: 文件节点，Python文件的函数作为子节点
         """
-        print(f"Building tree for path: {path}")
         children = {}
-        is_file = os.path.isfile(path)
-        content_hash = None
-        
-        if is_file and path.endswith('.py'):
+        if content_hash is None:
             content_hash = self._calculate_file_hash(path)
+        if path.endswith('.py'):
             # 对Python文件，提取函数并作为子节点
-            function_nodes = self._extract_functions(path)
-            for func_node in function_nodes:
-                print(f"Adding function node: {func_node.function_name}")
+            for func_node in self._get_functions(path, content_hash):
                 children[func_node.function_name] = func_node
             # 文件节点的哈希值包含所有函数节点的哈希
-            child_hashes = sorted(child.hash for child in children.values())
-            hash_value = hashlib.sha256(
-                (content_hash + ''.join(child_hashes)).encode()
-            ).hexdigest()
-        elif is_file:
-            content_hash = self._calculate_file_hash(path)
-            hash_value = content_hash
+            child_hashes = [child.hash for child in children.values()]
+            child_hashes.sort()
+            child_hashes.insert(0, content_hash)
+            hash_value = _hasher(b''.join(child_hashes)).digest()
         else:
-            # Process directory
-            try:
-                for name in os.listdir(path):
-                    if name.startswith('.') or name == '__pycache__':
-                        continue
-                    child_path = os.path.join(path, name)
-                    children[name] = self._build_tree(child_path)
-            except Exception as e:
-                print(f"Error processing directory {path}: {e}")
-            
-            # Calculate directory hash from children
-            child_hashes = sorted(child.hash for child in children.values())
-            hash_value = hashlib.sha256(''.join(child_hashes).encode()).hexdigest()
-        
+            hash_value = content_hash
+
         return MerkleNode(
             hash=hash_value,
             path=path,
             children=children,
-            is_file=is_file,
+            is_file=True,
             content_hash=content_hash
         )
 
+    def _build_file_nodes_batch(self, files: List[Tuple[str, Optional[int], Optional[int], Optional[MerkleNode]]]) -> List[MerkleNode]:
+        """批量构建文件节点（计算文件哈希并提取函数）
+
+        内容哈希与旧节点一致的文件（如仅修改时间变化）直接沿用旧节点的
+        哈希和函数子节点，不再解析文件。
+
+        Args:
+            files: [(文件路径, mtime_ns, size, 同一路径的旧文件节点或None)]
+
+        Returns:
+            List[MerkleNode]: 与files顺序一致的文件节点列表
+        """
+        nodes = []
+        for path, mtime_ns, size, old_node in files:
+            content_hash = self._calculate_file_hash(path)
+            if old_node is not None and content_hash and old_node.content_hash == content_hash:
+                node = replace(old_node, mtime_ns=mtime_ns, size=size)
+            else:
+                node = self._build_file_node(path, content_hash)
+                node.mtime_ns = mtime_ns
+                node.size = size
+            nodes.append(node)
+        return nodes
+
+    def _build_file_nodes(self, files: List[Tuple[str, Optional[int], Optional[int], Optional[MerkleNode]]]) -> Dict[str, MerkleNode]:
+        """构建多个文件节点，文件较多时使用线程池并行构建
+
+        文件读取和哈希计算时会释放GIL，因此线程池可以并行处理I/O和哈希。
+
+        Args:
+            files: [(文件路径, mtime_ns, size, 同一路径的旧文件节点或None)]
+
+        Returns:
+            Dict[str, MerkleNode]: 文件路径到文件节点的映射
+        """
+        if len(files) < PARALLEL_THRESHOLD:
+            nodes = self._build_file_nodes_batch(files)
+        else:
+            # 文件较少时缩小批次，保证所有线程都能分到任务
+            batch_size = min(HASH_BATCH_SIZE, -(-len(files) // HASH_WORKERS))
+            batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+            with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+                nodes = chain.from_iterable(executor.map(self._build_file_nodes_batch, batches))
+        return {node.path: node for node in nodes}
+
+    def _collect_files(self, root: MerkleNode) -> Tuple[List[MerkleNode], List[Tuple]]:
+        """遍历目录，建立目录节点骨架并收集所有Python文件
+
+        Args:
+            root: 根目录节点
+
+        Returns:
+            Tuple: (按先序排列的目录节点列表, [(父目录节点, 文件名, 文件路径, mtime_ns, size)])
+        """
+        dirs = []
+        files = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            dirs.append(node)
+            try:
+                with os.scandir(node.path) as it:
+                    entries = sorted(
+                        (e for e in it if not e.name.startswith('.') and e.name != '__pycache__'),
+                        key=lambda e: e.name
+                    )
+            except OSError as e:
+                logger.warning("Error processing directory %s: %s", node.path, e)
+                continue
+
+            for entry in entries:
+                # 路径会在新旧树的索引和变化集合中反复作为键使用，驻留以共享同一对象
+                entry_path = sys.intern(entry.path)
+                if entry.is_file():
+                    # 只跟踪Python文件，其他文件不读取也不计算哈希
+                    if not entry.name.endswith('.py'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                        files.append((node, entry.name, entry_path, stat.st_mtime_ns, stat.st_size))
+                    except OSError:
+                        files.append((node, entry.name, entry_path, None, None))
+                else:
+                    child = MerkleNode(hash=b'', path=entry_path, children={}, is_file=False)
+                    node.children[entry.name] = child
+                    stack.append(child)
+        return dirs, files
+
+    def _assemble_tree(self, dirs: List[MerkleNode], files: List[Tuple],
+                       file_nodes: Dict[str, MerkleNode],
+                       previous_dirs: Optional[Dict[str, MerkleNode]] = None) -> MerkleNode:
+        """挂载文件节点，并自底向上计算目录哈希
+
+        子节点与旧树中同路径目录的子节点完全相同（同一对象）的目录直接复用旧节点，
+        不再计算哈希，未变化的子树因此在新旧两棵树之间共享。
+
+        Args:
+            dirs: 按先序排列的目录节点列表
+            files: [(父目录节点, 文件名, 文件路径, mtime_ns, size)]
+            file_nodes: 文件路径到文件节点（新构建或复用的旧节点）的映射
+            previous_dirs: 旧树中目录路径到目录节点的映射
+
+        Returns:
+            MerkleNode: 根目录节点（可能是复用的旧节点）
+        """
+        for parent, name, path, _, _ in files:
+            parent.children[name] = file_nodes[path]
+
+        previous_dirs = previous_dirs or {}
+        reused_dirs = {}
+        # 先序的逆序保证子目录先于父目录计算；
+        # 所有目录复用同一个列表原地排序子节点哈希，避免每个目录分配新列表
+        child_hashes = []
+        for node in reversed(dirs):
+            children = node.children
+            for name, child in children.items():
+                if not child.is_file and child.path in reused_dirs:
+                    children[name] = reused_dirs[child.path]
+
+            old_node = previous_dirs.get(node.path)
+            if (old_node is not None and len(old_node.children) == len(children)
+                    and all(old_node.children.get(name) is child for name, child in children.items())):
+                reused_dirs[node.path] = old_node
+                continue
+
+            # Calculate directory hash from children
+            child_hashes.clear()
+            child_hashes.extend(child.hash for child in children.values())
+            child_hashes.sort()
+            # 子节点摘要定长，拼接后一次交给哈希函数，只需一次C调用
+            node.hash = _hasher(b''.join(child_hashes)).digest()
+
+        root = dirs[0]
+        return reused_dirs.get(root.path, root)
+
+    def _build_tree(self, path: str, previous: Optional[MerkleNode] = None,
+                    changes: Optional[Dict[str, Set[str]]] = None) -> MerkleNode:
+        """构建目录的Merkle树
+
+        先遍历目录收集文件，再用线程池并行构建文件节点（计算哈希并提取函数），
+        最后组装节点并计算目录哈希。修改时间和大小都与旧树一致的文件直接复用
+        旧节点，不再读取文件内容；内容未变化的目录也复用旧节点，因此增量更新
+        只对变化的文件计算哈希和解析函数。
+
+        Args:
+            path: 当前处理的路径
+            previous: 上一次构建的树，用于复用未变化的文件节点
+            changes: 若提供，则在构建过程中直接记录与previous相比的Python文件变化，
+                     包含added、modified和removed三个集合
+
+        Returns:
+            MerkleNode: 构建的Merkle树节点
+        """
+        if os.path.isfile(path):
+            root = self._build_file_node(path)
+            if changes is not None:
+                previous_files = self._index_files(previous) if previous else {}
+                old_node = previous_files.pop(path, None)
+                if path.endswith('.py'):
+                    self._diff_file(root, old_node, changes)
+                self._collect_removed(previous_files, changes)
+            return root
+
+        root = MerkleNode(hash=b'', path=path, children={}, is_file=False)
+        dirs, files = self._collect_files(root)
+
+        previous_files = self._index_files(previous) if previous else {}
+        previous_dirs = self._index_dirs(previous) if previous else {}
+        file_nodes = {}
+        to_build = []
+        for _, _, file_path, mtime_ns, size in files:
+            old_node = previous_files.get(file_path)
+            if (old_node is not None and mtime_ns is not None
+                    and old_node.mtime_ns == mtime_ns and old_node.size == size):
+                file_nodes[file_path] = old_node
+            else:
+                to_build.append((file_path, mtime_ns, size, old_node))
+        file_nodes.update(self._build_file_nodes(to_build))
+
+        root = self._assemble_tree(dirs, files, file_nodes, previous_dirs)
+
+        if changes is not None:
+            for parent, name, file_path, _, _ in files:
+                self._diff_file(parent.children[name], previous_files.pop(file_path, None), changes)
+            self._collect_removed(previous_files, changes)
+        return root
+
+    def _diff_file(self, new_node: MerkleNode, old_node: Optional[MerkleNode],
+                   changes: Dict[str, Set[str]]):
+        """比较同一路径的新旧文件节点，并记录Python文件的变化
+
+        _collect_files只收集Python文件，因此这里不再逐个检查文件后缀。
+
+        Args:
+            new_node: 当前树中的文件节点
+            old_node: 上一个树中的文件节点（可能为None，表示新文件）
+            changes: 变化集合，包含added、modified和removed
+        """
+        if new_node is old_node:
+            return
+        if old_node is None:
+            changes['added'].add(new_node.path)
+        elif new_node.hash != old_node.hash:
+            changes['modified'].add(new_node.path)
+        self._compare_function_nodes(new_node, old_node, changes['modified'])
+
+    def _collect_removed(self, previous_files: Dict[str, MerkleNode], changes: Dict[str, Set[str]]):
+        """将新树中不再存在的Python文件记录为删除
+
+        旧版本保存的树可能包含非Python文件，因此仍需按后缀过滤。
+
+        Args:
+            previous_files: 上一个树中未被匹配的文件节点
+            changes: 变化集合，包含added、modified和removed
+        """
+        changes['removed'].update(path for path in previous_files if path.endswith('.py'))
+
+    def _index_files(self, node: MerkleNode) -> Dict[str, MerkleNode]:
+        """建立节点下所有文件路径到文件节点的索引
+
+        Args:
+            node: 起始节点
+
+        Returns:
+            Dict[str, MerkleNode]: 文件路径到文件节点的映射
+        """
+        index = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.is_file:
+                index[current.path] = current
+            else:
+                stack.extend(current.children.values())
+        return index
+
+    def _index_dirs(self, node: MerkleNode) -> Dict[str, MerkleNode]:
+        """建立节点下所有目录路径到目录节点的索引
+
+        Args:
+            node: 起始节点
+
+        Returns:
+            Dict[str, MerkleNode]: 目录路径到目录节点的映射
+        """
+        index = {}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if not current.is_file:
+                index[current.path] = current
+                stack.extend(current.children.values())
+        return index
+
     def get_changes(self) -> Dict[str, Set[str]]:
         """获取自上次更新以来的文件变化
-        
+
+        使用显式栈同时遍历新旧两棵树，节点为同一对象或哈希相同时整棵子树
+        必然相同，直接跳过，只深入哈希不同的子树。
+
         Returns:
             Dict[str, Set[str]]: 包含added、modified和removed三个键的字典，
                                 值为对应的文件路径集合
         """
         if not self.previous_root:
             return {
-                'added': {node.path for node in self._get_all_files(self.root)},
+                'added': set(self._index_files(self.root)),
                 'modified': set(),
                 'removed': set()
             }
-        
-        added = set()
-        modified = set()
-        removed = set()
-        
-        self._compare_nodes(self.root, self.previous_root, added, modified, removed)
-        
-        return {
-            'added': {path for path in added if path.endswith('.py')},
-            'modified': {path for path in modified if path.endswith('.py')},
-            'removed': {path for path in removed if path.endswith('.py')}
+
+        changes = {
+            'added': set(),
+            'modified': set(),
+            'removed': set()
         }
+        stack = [(self.root, self.previous_root)]
+        while stack:
+            new_node, old_node = stack.pop()
+            if new_node is old_node or new_node.hash == old_node.hash:
+                continue
+
+            if new_node.is_file and old_node.is_file:
+                self._diff_file(new_node, old_node, changes)
+            elif new_node.is_file or old_node.is_file:
+                # 文件与目录互相替换，按整体新增和删除处理
+                self._collect_added(new_node, changes)
+                self._collect_removed(self._index_files(old_node), changes)
+            else:
+                old_children = old_node.children
+                for name, child in new_node.children.items():
+                    old_child = old_children.get(name)
+                    if old_child is None:
+                        self._collect_added(child, changes)
+                    else:
+                        stack.append((child, old_child))
+                for name, old_child in old_children.items():
+                    if name not in new_node.children:
+                        self._collect_removed(self._index_files(old_child), changes)
+        return changes
+
+    def _collect_added(self, node: MerkleNode, changes: Dict[str, Set[str]]):
+        """将节点下的所有Python文件记录为新增
 
-    def _compare_nodes(self, node1: Optional[MerkleNode], node2: Optional[MerkleNode], 
-                      added: Set[str], modified: Set[str], removed: Set[str]):
-        """递归比较两个节点并收集变化
-        
         Args:
-            node1: 当前树的节点
-            node2: 上一个树的节点
-            added: 新增文件的集合
-            modified: 修改文件的集合
-            removed: 删除文件的集合
+            node: 新树中新增的节点
+            changes: 变化集合，包含added、modified和removed
         """
-        if not node1 and not node2:
-            return
-            
-        if not node2:  # 新增
-            if node1.is_file:
-                added.add(node1.path)
-                # 如果是新增的Python文件，处理其中的函数
-                if node1.path.endswith('.py'):
-                    self._compare_function_nodes(node1, None, modified)
-            elif node1.is_function:
-                # 新增函数时，将其父文件标记为修改
-                parent_path = node1.path.split('::')[0]
-                modified.add(parent_path)
-            else:
-                for child in node1.children.values():
-                    self._compare_nodes(child, None, added, modified, removed)
-            return
-            
-        if not node1:  # 删除
-            if node2.is_file:
-                removed.add(node2.path)
-            elif node2.is_function:
-                # 删除函数时，将其父文件标记为修改
-                parent_path = node2.path.split('::')[0]
-                modified.add(parent_path)
-            else:
-                for child in node2.children.values():
-                    self._compare_nodes(None, child, added, modified, removed)
-            return
-        
-        # 比较两个节点
-        if node1.is_file and node2.is_file:
-            if node1.hash != node2.hash:
-                modified.add(node1.path)
-            # 如果是Python文件，比较函数节点
-            if node1.path.endswith('.py'):
-                self._compare_function_nodes(node1, node2, modified)
-        else:
-            # 比较目录内容
-            all_children = set(node1.children.keys()) | set(node2.children.keys())
-            for child_name in all_children:
-                child1 = node1.children.get(child_name)
-                child2 = node2.children.get(child_name)
-                self._compare_nodes(child1, child2, added, modified, removed)
-    
+        for file_node in self._index_files(node).values():
+            if file_node.path.endswith('.py'):
+                self._diff_file(file_node, None, changes)
+
     def _compare_function_nodes(self, file_node1: MerkleNode, file_node2: Optional[MerkleNode], modified: Set[str]):
         """比较两个文件节点中的函数节点
+
+        Python文件节点的子节点都是函数节点，对(函数名, 哈希)做对称差即可
+        一次得到新增、删除和修改的函数。
         
         Args:
             file_node1: 当前文件节点
             file_node2: 上一个文件节点（可能为None，表示新文件）
             modified: 修改文件的集合
         """
-        # 获取当前文件中的所有函数
-        funcs1 = {name: node for name, node in file_node1.children.items() if node.is_function}
-        
-        # 如果是新文件，所有函数都是新增的
-        if file_node2 is None:
-            for func_name, func_node in funcs1.items():
-                print(f"New function added in new file: {func_name}")
-                self.changed_functions[file_node1.path] = set(funcs1.keys())
-                modified.add(file_node1.path)
-            return
-            
-        # 获取旧文件中的所有函数
-        funcs2 = {name: node for name, node in file_node2.children.items() if node.is_function}
-        
-        # 检查函数变化
-        all_funcs = set(funcs1.keys()) | set(funcs2.keys())
-        changed_funcs = set()
-        
-        for func_name in all_funcs:
-            func1 = funcs1.get(func_name)
-            func2 = funcs2.get(func_name)
-            
-            if not func2:  # 新增函数
-                print(f"New function added: {func_name}")
-                changed_funcs.add(func_name)
-                modified.add(file_node1.path)
-            elif not func1:  # 删除函数
-                print(f"Function removed: {func_name}")
-                changed_funcs.add(func_name)
-                modified.add(file_node2.path)
-            elif func1.hash != func2.hash:  # 函数修改
-                print(f"Function modified: {func_name}")
-                changed_funcs.add(func_name)
-                modified.add(file_node1.path)
-        
+        funcs1 = {name: node.hash for name, node in file_node1.children.items()}
+        funcs2 = {name: node.hash for name, node in file_node2.children.items()} if file_node2 else {}
+        changed_funcs = {name for name, _ in funcs1.items() ^ funcs2.items()}
+
         # 记录文件中发生变化的函数
         if changed_funcs:
+            logger.debug("Functions changed in %s: %s", file_node1.path, changed_funcs)
             self.changed_functions[file_node1.path] = changed_funcs
+            modified.add(file_node1.path)
 
     def update(self) -> Dict[str, Set[str]]:
         """更新树并返回变化的文件
@@ -308,93 +649,400 @@ class MerkleTree:
         Returns:
             Dict[str, Set[str]]: 文件变化信息
         """
-        print("Updating Merkle tree...")
+        logger.debug("Updating Merkle tree...")
         # Store previous root
         self.previous_root = self.root
         
         # Reset changed functions
         self.changed_functions = {}
         
-        # Rebuild tree
-        print(f"Building new tree from {self.root_dir}")
-        self.root = self._build_tree(self.root_dir)
-        
-        # Get changes
-        added = set()
-        modified = set()
-        removed = set()
-        
-        print("Comparing old and new trees...")
-        self._compare_nodes(self.root, self.previous_root, added, modified, removed)
-        
-        return {
-            'added': {path for path in added if path.endswith('.py')},
-            'modified': {path for path in modified if path.endswith('.py')},
-            'removed': {path for path in removed if path.endswith('.py')}
+        # Rebuild tree and collect changes in the same pass
+        logger.debug("Building new tree from %s", self.root_dir)
+        changes = {
+            'added': set(),
+            'modified': set(),
+            'removed': set()
         }
+        self.root = self._build_tree(self.root_dir, self.previous_root, changes)
+        return changes
+
+    def update_path(self, path: str) -> Dict[str, Set[str]]:
+        """只根据单个文件的变化更新树并返回变化的文件
+
+        只重新构建该文件的叶子节点，并复制从根到该文件路径上的目录节点、
+        重新计算它们的哈希，其余子树在新旧两棵树之间共享，因此开销与
+        路径深度成正比，而不是与目录下的文件总数成正比。
+        路径无法按单个文件处理时（如目录、根目录本身是文件、文件与目录互相
+        替换）回退到全量的update()。
 
-    def _get_all_files(self, node: MerkleNode) -> List[MerkleNode]:
-        """获取节点下的所有文件节点
-        
         Args:
-            node: 起始节点
-            
+            path: 发生变化的文件路径
+
         Returns:
-            List[MerkleNode]: 文件节点列表
+            Dict[str, Set[str]]: 文件变化信息
         """
-        if node.is_file:
-            return [node]
-            
-        files = []
-        for child in node.children.values():
-            files.extend(self._get_all_files(child))
-        return files
+        rel_path = os.path.relpath(path, self.root_dir)
+        parts = rel_path.split(os.sep)
+        if self.root is None or self.root.is_file or os.path.isdir(path) or parts[0] in (os.curdir, os.pardir):
+            return self.update()
+
+        self.previous_root = self.root
+        self.changed_functions = {}
+        changes = {
+            'added': set(),
+            'modified': set(),
+            'removed': set()
+        }
+        # 与_collect_files一致：只跟踪Python文件，跳过隐藏文件和__pycache__
+        if not path.endswith('.py') or any(part.startswith('.') or part == '__pycache__' for part in parts):
+            return changes
+
+        # 沿路径找到旧的目录节点和文件节点
+        old_dirs = []
+        node = self.root
+        for part in parts[:-1]:
+            old_dirs.append(node)
+            node = node.children.get(part) if node is not None else None
+            if node is not None and node.is_file:
+                return self.update()
+        old_dirs.append(node)
+        parent = node
+        old_file = parent.children.get(parts[-1]) if parent is not None else None
+        if old_file is not None and not old_file.is_file:
+            return self.update()
+
+        # 与树中路径保持一致，由根目录和各级名称拼接
+        file_path = sys.intern(os.path.join(self.root_dir, *parts))
+        try:
+            stat = os.stat(file_path)
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            new_file = None
+        except OSError:
+            new_file = self._build_file_nodes_batch([(file_path, None, None, old_file)])[0]
+        else:
+            if old_file is not None and old_file.mtime_ns == mtime_ns and old_file.size == size:
+                return changes
+            new_file = self._build_file_nodes_batch([(file_path, mtime_ns, size, old_file)])[0]
+
+        if new_file is None:
+            if old_file is None:
+                return changes
+            self._collect_removed({file_path: old_file}, changes)
+        else:
+            self._diff_file(new_file, old_file, changes)
+
+        # 自底向上复制路径上的目录节点，未变化的兄弟子树直接共享
+        child = new_file
+        for depth in range(len(parts) - 1, -1, -1):
+            old_dir = old_dirs[depth]
+            children = dict(old_dir.children) if old_dir is not None else {}
+            name = parts[depth]
+            if child is None:
+                children.pop(name, None)
+            else:
+                children[name] = child
+            dir_path = sys.intern(os.path.join(self.root_dir, *parts[:depth])) if depth else self.root.path
+            child_hashes = sorted(node.hash for node in children.values())
+            child = MerkleNode(
+                hash=_hasher(b''.join(child_hashes)).digest(),
+                path=dir_path,
+                children=children,
+                is_file=False
+            )
+        self.root = child
+        return changes
+
+    def _flatten_tree(self, root: MerkleNode) -> dict:
+        """将树按广度优先顺序展平为节点记录列表
+
+        每条记录为 [hash, path, is_file, content_hash, parent_id, is_function,
+        function_name, function_doc, mtime_ns, size]，节点id即其在列表中的下标，
+        根节点的parent_id为-1。函数节点的path和content_hash可由父文件路径和
+        函数哈希推出，保存为None以缩小状态。
+
+        Args:
+            root: 根节点
+
+        Returns:
+            dict: {'records': 节点记录列表}
+        """
+        records = []
+        queue = deque([(root, -1)])
+        while queue:
+            node, parent_id = queue.popleft()
+            node_id = len(records)
+            queue.extend((child, node_id) for child in node.children.values())
+            # 哈希值在内部以字节保存，序列化时转换为十六进制字符串
+            if node.is_function:
+                path = content_hash = None
+            else:
+                path = node.path
+                content_hash = node.content_hash.hex() if node.content_hash is not None else None
+            records.append([
+                node.hash.hex(),
+                path,
+                node.is_file,
+                content_hash,
+                parent_id,
+                node.is_function,
+                node.function_name,
+                node.function_doc,
+                node.mtime_ns,
+                node.size
+            ])
+        return {'records': records}
+
+    def _unflatten_tree(self, data: dict) -> MerkleNode:
+        """从展平的节点记录列表重建树
+
+        记录按广度优先顺序排列，父节点总在子节点之前，因此一次遍历即可
+        创建节点并挂到父节点下。同时兼容旧的 {'nodes', 'root_id'} 子节点列表格式。
+
+        Args:
+            data: _flatten_tree生成的字典
+
+        Returns:
+            MerkleNode: 根节点
+        """
+        if 'nodes' in data:
+            return self._unflatten_child_lists(data)
+
+        nodes = []
+        for record in data['records']:
+            parent = nodes[record[4]] if record[4] >= 0 else None
+            func_hash = bytes.fromhex(record[0])
+            if record[5]:
+                name = record[6]
+                node = MerkleNode(
+                    hash=func_hash,
+                    path=f"{parent.path}::{name}",
+                    children=EMPTY_CHILDREN,
+                    is_file=False,
+                    is_function=True,
+                    content_hash=func_hash,
+                    function_name=name,
+                    function_doc=record[7]
+                )
+            else:
+                node = MerkleNode(
+                    hash=func_hash,
+                    path=sys.intern(record[1]),
+                    children={},
+                    is_file=record[2],
+                    content_hash=bytes.fromhex(record[3]) if record[3] is not None else None,
+                    mtime_ns=record[8],
+                    size=record[9]
+                )
+                name = os.path.basename(node.path)
+            if parent is not None:
+                parent.children[name] = node
+            nodes.append(node)
+        return nodes[0]
+
+    def _unflatten_child_lists(self, data: dict) -> MerkleNode:
+        """从旧的子节点列表格式重建树
+
+        Args:
+            data: {'nodes': 节点记录列表, 'root_id': 根节点id}
+
+        Returns:
+            MerkleNode: 根节点
+        """
+        records = data['nodes']
+        nodes = [
+            MerkleNode(
+                hash=bytes.fromhex(record[0]),
+                path=sys.intern(record[1]),
+                children=EMPTY_CHILDREN if record[5] else {},
+                is_file=record[2],
+                content_hash=bytes.fromhex(record[3]) if record[3] is not None else None,
+                is_function=record[5],
+                function_name=record[6],
+                function_doc=record[7],
+                mtime_ns=record[8],
+                size=record[9]
+            )
+            for record in records
+        ]
+        for node, record in zip(nodes, records):
+            for name, child_id in record[4]:
+                node.children[name] = nodes[child_id]
+        return nodes[data['root_id']]
 
     def get_state(self) -> dict:
         """获取当前状态
         
         Returns:
-            dict: 包含当前状态的字典
+            dict: 包含当前状态的字典，树以展平的节点列表表示
         """
-        def node_to_dict(node: MerkleNode) -> dict:
-            return {
-                'hash': node.hash,
-                'path': node.path,
-                'children': {name: node_to_dict(child) for name, child in node.children.items()},
-                'is_file': node.is_file,
-                'content_hash': node.content_hash,
-                'is_function': node.is_function,
-                'function_name': node.function_name,
-                'function_doc': node.function_doc
-            }
-        
         return {
             'root_dir': self.root_dir,
-            'root': node_to_dict(self.root) if self.root else None,
-            'previous_root': node_to_dict(self.previous_root) if self.previous_root else None
+            'hash_algorithm': STATE_VERSION,
+            'root': self._flatten_tree(self.root) if self.root else None,
+            'previous_root': self._flatten_tree(self.previous_root) if self.previous_root else None
         }
     
     def load_state(self, state: dict):
         """从状态字典加载
+
+        同时兼容展平的节点列表格式和旧版本的嵌套字典格式。
         
         Args:
             state: 状态字典
         """
         def dict_to_node(data: dict) -> MerkleNode:
+            if data.get('is_function', False):
+                children = EMPTY_CHILDREN
+            else:
+                children = {name: dict_to_node(child) for name, child in data['children'].items()}
             return MerkleNode(
-                hash=data['hash'],
+                hash=bytes.fromhex(data['hash']),
                 path=data['path'],
-                children={name: dict_to_node(child) for name, child in data['children'].items()},
+                children=children,
                 is_file=data['is_file'],
-                content_hash=data['content_hash'],
+                content_hash=bytes.fromhex(data['content_hash']) if data['content_hash'] is not None else None,
                 is_function=data.get('is_function', False),
                 function_name=data.get('function_name'),
-                function_doc=data.get('function_doc')
+                function_doc=data.get('function_doc'),
+                mtime_ns=data.get('mtime_ns'),
+                size=data.get('size')
             )
+
+        def load_tree(data: Optional[dict]) -> Optional[MerkleNode]:
+            if not data:
+                return None
+            if 'records' in data or 'nodes' in data:
+                return self._unflatten_tree(data)
+            return dict_to_node(data)
         
         self.root_dir = state['root_dir']
-        self.root = dict_to_node(state['root']) if state['root'] else None
-        self.previous_root = dict_to_node(state['previous_root']) if state['previous_root'] else None
+        self.root = load_tree(state['root'])
+        self.previous_root = load_tree(state['previous_root'])
+        self._prepare_loaded_tree(state.get('hash_algorithm', 'sha256'))
+
+    def _prepare_loaded_tree(self, state_version: str):
+        """加载已保存的树之后预热函数缓存，并处理状态版本的变化
+
+        Args:
+            state_version: 保存树时的状态版本（旧版本保存的是哈希算法名）
+        """
+        # 哈希算法或函数提取规则变化时，已保存的哈希和函数节点都不可再用；
+        # 清除文件的mtime/size和内容哈希，使下次更新时重新计算哈希并重新解析所有文件
+        if state_version != STATE_VERSION:
+            if self.root:
+                logger.info("Merkle state version changed to %s, files will be rehashed", STATE_VERSION)
+                for node in self._index_files(self.root).values():
+                    node.mtime_ns = None
+                    node.size = None
+                    node.content_hash = None
+            return
+
+        # 用已保存树中的函数节点预热函数缓存，重启后内容未变的文件无需重新解析
+        for tree in (self.previous_root, self.root):
+            if tree is None:
+                continue
+            for node in self._index_files(tree).values():
+                if node.content_hash and node.path.endswith('.py'):
+                    self._cache_functions(node.content_hash, node.children.values())
+
+    def get_file_nodes(self) -> Dict[str, MerkleNode]:
+        """获取当前树中所有文件路径到文件节点的映射
+
+        未变化的文件在每次更新后沿用同一个节点对象，
+        因此可以按对象是否相同判断哪些文件需要重新保存。
+
+        Returns:
+            Dict[str, MerkleNode]: 文件路径到文件节点的映射
+        """
+        return self._index_files(self.root) if self.root else {}
+
+    @staticmethod
+    def leaf_record(node: MerkleNode) -> dict:
+        """将文件节点转换为可直接作为图数据库节点属性保存的记录
+
+        数据库属性不支持嵌套结构和包含null的列表，函数子节点按名称、
+        哈希和文档拆分为三个并列的列表，缺少文档时保存为空字符串。
+
+        Args:
+            node: 文件节点
+
+        Returns:
+            dict: 叶子记录，哈希值为十六进制字符串
+        """
+        functions = list(node.children.values())
+        return {
+            'path': node.path,
+            'hash': node.hash.hex(),
+            'content_hash': node.content_hash.hex() if node.content_hash is not None else None,
+            'mtime_ns': node.mtime_ns,
+            'size': node.size,
+            'function_names': [func.function_name for func in functions],
+            'function_hashes': [func.hash.hex() for func in functions],
+            'function_docs': [func.function_doc or '' for func in functions]
+        }
+
+    def load_leaves(self, records: List[dict], state_version: str = None):
+        """从文件叶子记录重建树，目录节点及其哈希在内存中重新计算
+
+        不在根目录下的记录会被忽略。图数据库不保存值为null的属性，
+        因此记录中可为空的字段可能缺失，缺失时按None处理。
+
+        Args:
+            records: leaf_record生成的记录列表
+            state_version: 保存记录时的状态版本，默认为当前版本
+        """
+        root = MerkleNode(hash=b'', path=self.root_dir, children={}, is_file=False)
+        dirs = {(): root}
+        for record in records:
+            parts = tuple(os.path.relpath(record['path'], self.root_dir).split(os.sep))
+            if parts[0] in (os.curdir, os.pardir):
+                continue
+
+            # 按需创建路径上的目录节点
+            parent = root
+            for depth in range(1, len(parts)):
+                node = dirs.get(parts[:depth])
+                if node is None:
+                    node = MerkleNode(hash=b'', path=sys.intern(os.path.join(self.root_dir, *parts[:depth])),
+                                      children={}, is_file=False)
+                    parent.children[parts[depth - 1]] = node
+                    dirs[parts[:depth]] = node
+                parent = node
+
+            path = sys.intern(os.path.join(self.root_dir, *parts))
+            children = {}
+            for name, func_hash, doc in zip(record['function_names'], record['function_hashes'],
+                                            record['function_docs']):
+                func_hash = bytes.fromhex(func_hash)
+                children[name] = MerkleNode(
+                    hash=func_hash,
+                    path=f"{path}::{name}",
+                    children=EMPTY_CHILDREN,
+                    is_file=False,
+                    is_function=True,
+                    content_hash=func_hash,
+                    function_name=name,
+                    function_doc=doc or None
+                )
+            parent.children[parts[-1]] = MerkleNode(
+                hash=bytes.fromhex(record['hash']),
+                path=path,
+                children=children,
+                is_file=True,
+                content_hash=bytes.fromhex(record['content_hash']) if record.get('content_hash') is not None else None,
+                mtime_ns=record.get('mtime_ns'),
+                size=record.get('size')
+            )
+
+        # 路径越长的目录越深，按深度从深到浅计算目录哈希
+        for parts in sorted(dirs, key=len, reverse=True):
+            node = dirs[parts]
+            node.hash = _hasher(b''.join(sorted(child.hash for child in node.children.values()))).digest()
+
+        self.root = root
+        self.previous_root = None
+        self._prepare_loaded_tree(state_version or STATE_VERSION)
 
     def visualize(self, node: Optional[MerkleNode] = None, indent: str = "", is_last: bool = True) -> None:
         """在终端中可视化显示Merkle树结构
@@ -485,44 +1133,3 @@ class MerkleTree:
             child2 = node2.children.get(child_name) if node2 else None
             child_path = os.path.join(path, child_name) if path else child_name
             self.visualize_diff(next_indent, child1, child2, child_path)
-
-    def get_changes(self) -> Dict[str, Set[str]]:
-        """获取当前树与之前状态的变化
-        
-        Returns:
-            Dict[str, Set[str]]: 包含added、modified和removed的文件路径集合
-        """
-        changes = {
-            'added': set(),
-            'modified': set(),
-            'removed': set()
-        }
-        
-        def compare_nodes(node1: Optional[MerkleNode], node2: Optional[MerkleNode], 
-                         path: str = "") -> None:
-            if not node1 and not node2:
-                return
-                
-            current_path = os.path.join(path, os.path.basename(
-                node1.path if node1 else node2.path))
-            
-            if node1 and node2:
-                if node1.hash != node2.hash:
-                    changes['modified'].add(current_path)
-            elif node1:
-                changes['added'].add(current_path)
-            else:  # node2
-                changes['removed'].add(current_path)
-            
-            # 递归处理子节点
-            children1 = node1.children if node1 else {}
-            children2 = node2.children if node2 else {}
-            all_children = set(children1.keys()) | set(children2.keys())
-            
-            for child_name in all_children:
-                child1 = children1.get(child_name)
-                child2 = children2.get(child_name)
-                compare_nodes(child1, child2, current_path)
-        
-        compare_nodes(self.root, self.previous_root)
-        return changes
@@ -1,188 +1,375 @@
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Union, Callable, Tuple, Iterator, AsyncIterator
+import asyncio
 import importlib
 import inspect
+import logging
+import types
+import typing
+from collections.abc import Mapping
+from contextlib import contextmanager
 import os
 import sys
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Cypher statements are module constants so every call sends the identical
+# text and reuses the server's cached query plan
+_CYPHER_CREATE_TASK_PROBE = """
+OPTIONAL MATCH (task:Task {name: $name})
+RETURN task {.name, .description, .input_params, .output_params} as task,
+       [tool_name IN $tool_names
+        WHERE NOT EXISTS { MATCH (:Tool {name: tool_name}) }] as missing_tools
+"""
+
+_CYPHER_CREATE_TASK = """
+OPTIONAL MATCH (existing:Task {name: $name})
+CALL {
+    WITH existing
+    WITH existing WHERE existing IS NULL
+    CREATE (task:Task {
+        name: $name,
+        description: $description,
+        embedding: $embedding,
+        input_params: $input_params,
+        output_params: $output_params
+    })
+    WITH task
+    // The task is new, so its links can be created without a MERGE lookup
+    CALL {
+        WITH task
+        UNWIND $tool_entries as entry
+        MATCH (tool:Tool {name: entry.name})
+        CREATE (task)-[:USES {order: entry.order, outputs: entry.outputs}]->(tool)
+    }
+    RETURN task
+  UNION
+    WITH existing
+    WITH existing WHERE existing IS NOT NULL
+    RETURN existing as task
+}
+RETURN task {.name, .description, .input_params, .output_params} as task
+"""
+
+_CYPHER_CREATE_TASKS_BULK_PROBE = """
+UNWIND $rows as row
+OPTIONAL MATCH (task:Task {name: row.name})
+RETURN row.name as name, task {.name, .description, .input_params, .output_params} as task,
+       [tool_name IN row.tool_names
+        WHERE NOT EXISTS { MATCH (:Tool {name: tool_name}) }] as missing_tools
+"""
+
+_CYPHER_CREATE_TASKS_BULK = """
+UNWIND $rows as row
+CREATE (task:Task {
+    name: row.name,
+    description: row.description,
+    embedding: row.embedding,
+    input_params: row.input_params,
+    output_params: row.output_params
+})
+WITH task, row
+CALL {
+    WITH task, row
+    UNWIND row.tool_entries as entry
+    MATCH (tool:Tool {name: entry.name})
+    CREATE (task)-[:USES {order: entry.order, outputs: entry.outputs}]->(tool)
+}
+RETURN task {.name, .description, .input_params, .output_params} as task
+"""
+
+_CYPHER_UPDATE_TASK_PROBE = """
+MATCH (task:Task {name: $name})
+RETURN task {.name, .description, .input_params, .output_params} as task,
+       [tool_name IN $tool_names
+        WHERE NOT EXISTS { MATCH (:Tool {name: tool_name}) }] as missing_tools
+"""
+
+_CYPHER_UPDATE_TASK = """
+MATCH (task:Task {name: $name})
+SET task.description = coalesce($description, task.description),
+    task.embedding = coalesce($embedding, task.embedding),
+    task.input_params = coalesce($input_params, task.input_params),
+    task.output_params = coalesce($output_params, task.output_params)
+WITH task
+CALL {
+    WITH task
+    WITH task WHERE $tool_entries IS NOT NULL
+    OPTIONAL MATCH (task)-[r:USES]->(:Tool)
+    DELETE r
+    WITH DISTINCT task
+    UNWIND $tool_entries as entry
+    MATCH (tool:Tool {name: entry.name})
+    MERGE (task)-[uses:USES {order: entry.order}]->(tool)
+    SET uses.outputs = entry.outputs
+}
+RETURN task {.name, .description, .input_params, .output_params} as task
+"""
+
+_CYPHER_EXECUTE_TASK = """
+MATCH (task:Task {name: $task_name})-[r:USES]->(tool:Tool)
+WITH task, tool, r ORDER BY r.order
+RETURN task {.input_params, .output_params} as task,
+       collect(tool {.name, .category, outputs: r.outputs}) as tools
+"""
+
+_CYPHER_GET_TASK = """
+MATCH (task:Task {name: $task_name})-[r:USES]->(tool:Tool)
+WITH task, tool ORDER BY r.order
+RETURN task {.name, .description, .input_params, .output_params,
+             tools: collect(tool {.name, .description, .category})} AS task
+"""
+
+_CYPHER_GET_TASK_PARAMETERS = """
+MATCH (task:Task {name: $task_name})
+RETURN task.input_params as input_params, task.output_params as output_params
+"""
+
+# Tasks are sorted first and each task's tools are ordered within its own
+# subquery, instead of sorting every (task, tool) row
+_CYPHER_LIST_TASKS = """
+MATCH (task:Task)
+WITH task ORDER BY task.name
+RETURN task {.name, .description, .input_params, .output_params,
+             tools: COLLECT {
+                 MATCH (task)-[r:USES]->(tool:Tool)
+                 WITH tool ORDER BY r.order
+                 RETURN tool {.name, .description, .category}
+             }} AS task
+"""
+# Embeddings are large and rarely needed in a listing, so they are only
+# projected on request; keep in sync with _CYPHER_LIST_TASKS
+_CYPHER_LIST_TASKS_WITH_EMBEDDING = """
+MATCH (task:Task)
+WITH task ORDER BY task.name
+RETURN task {.name, .description, .input_params, .output_params, .embedding,
+             tools: COLLECT {
+                 MATCH (task)-[r:USES]->(tool:Tool)
+                 WITH tool ORDER BY r.order
+                 RETURN tool {.name, .description, .category}
+             }} AS task
+"""
+
+_CYPHER_DELETE_TASK = """
+MATCH (t:Task {name: $task_name})
+OPTIONAL MATCH (w:Workflow)-[:CONTAINS]->(t)
+WITH t, count(w) as uses
+CALL {
+    WITH t, uses
+    WITH t WHERE uses = 0
+    DETACH DELETE t
+}
+RETURN uses
+"""
 
 class TaskManager:
+    # Resolved tool functions, their signatures, (required, all) parameter names
+    # and "Returns:" docstring names keyed by (category, name), shared by all
+    # instances and filled lazily on first execution
+    _tool_fn_cache: Dict[Tuple[str, str], Callable] = {}
+    _tool_sig_cache: Dict[Tuple[str, str], inspect.Signature] = {}
+    _tool_param_cache: Dict[Tuple[str, str], Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+    _tool_return_name_cache: Dict[Tuple[str, str], str] = {}
+
     def __init__(self, neo4j_manager, retriever_manager, tool_manager):
         self.neo4j_manager = neo4j_manager
         self.retriever_manager = retriever_manager
         self.tool_manager = tool_manager
 
+    @contextmanager
+    def batch(self):
+        """Run the enclosed task operations on one held database session
+
+        Usage:
+            with task_manager.batch() as tm:
+                tm.create_task(...)
+                tm.execute_task(...)
+        """
+        with self.neo4j_manager.session_scope():
+            yield self
+
     def create_task(self, name: str, description: str, tool_names: List[str], 
-                   input_params: List[str] = None, output_params: List[str] = None) -> Dict:
+                   input_params: List[str] = None, output_params: List[str] = None,
+                   tool_outputs: Dict[str, List[str]] = None) -> Dict:
         """Create a new task and associate with tools
-        
+
         Args:
             name: Task name
             description: Task description
             tool_names: List of tool names
             input_params: List of required input parameter names
             output_params: List of output parameter names to return
+            tool_outputs: Optional mapping of tool name to the result keys it provides;
+                only those keys of a tool's dict result are merged into the context
         """
         if input_params is None:
             input_params = []
         if output_params is None:
             output_params = []
-            
-        with self.neo4j_manager.get_session() as session:
-            # Check if task exists
-            existing_task = session.run("""
-                MATCH (task:Task {name: $name})
-                RETURN task
-                LIMIT 1
-                """,
-                name=name
-            ).single()
-            
-            if existing_task:
-                return self._filter_node_info(existing_task["task"])
-            
-            # Check if all tools exist
-            missing_tools = []
-            for tool_name in tool_names:
-                tool_exists = session.run("""
-                    MATCH (tool:Tool {name: $tool_name})
-                    RETURN count(tool) > 0 as exists
-                    """,
-                    tool_name=tool_name
-                ).single()["exists"]
-                
-                if not tool_exists:
-                    missing_tools.append(tool_name)
-            
-            if missing_tools:
-                raise ValueError(f"The following tools do not exist: {', '.join(missing_tools)}")
-            
-            # Create embedding vector
-            embedding = self.retriever_manager.embedder.embed_query(f"{name} {description}")
-            
-            # Create new task and associate with tools
-            result = session.run("""
-                CREATE (task:Task {
-                    name: $name,
-                    description: $description,
-                    embedding: $embedding,
-                    input_params: $input_params,
-                    output_params: $output_params
-                })
-                WITH task
-                UNWIND range(0, size($tool_names)-1) as idx
-                WITH task, $tool_names[idx] as tool_name, idx
-                MATCH (tool:Tool {name: tool_name})
-                MERGE (task)-[:USES {order: idx}]->(tool)
-                RETURN task
-                """,
-                name=name,
-                description=description,
-                tool_names=tool_names,
-                embedding=embedding,
-                input_params=input_params,
-                output_params=output_params
+
+        # Check if task exists and which tools are missing in one round trip
+        record = self.neo4j_manager.run_read(
+            _CYPHER_CREATE_TASK_PROBE,
+            name=name,
+            tool_names=tool_names
+        )[0]
+
+        if record["task"] is not None:
+            return record["task"]
+
+        missing_tools = record["missing_tools"]
+        if missing_tools:
+            raise ValueError(f"The following tools do not exist: {', '.join(missing_tools)}")
+
+        # Create embedding vector
+        embedding = self.retriever_manager.embed_query(f"{name} {description}")
+
+        # Create the task and its tool links atomically; if another writer created
+        # the task since the probe, the existing task is returned instead
+        records = self.neo4j_manager.run_write(
+            _CYPHER_CREATE_TASK,
+            name=name,
+            description=description,
+            tool_entries=self._tool_entries(tool_names, tool_outputs),
+            embedding=embedding,
+            input_params=input_params,
+            output_params=output_params
+        )
+
+        return records[0]["task"] if records else None
+
+    def create_tasks_bulk(self, tasks: List[Dict]) -> List[Dict]:
+        """Create several tasks with one embeddings request and one write
+
+        Args:
+            tasks: List of dicts with the create_task arguments (name, description,
+                tool_names and optionally input_params, output_params and tool_outputs)
+
+        Returns:
+            List with one task info per input entry, in input order; existing tasks
+            are returned unchanged. Only the first entry of a repeated name is
+            created, and every entry with that name gets its task.
+        """
+        rows = {}
+        for task in tasks:
+            if task["name"] in rows:
+                logger.warning("Task '%s' is listed more than once, only its first entry is created", task["name"])
+                continue
+            rows[task["name"]] = {
+                "name": task["name"],
+                "description": task["description"],
+                "tool_names": task["tool_names"],
+                "tool_entries": self._tool_entries(task["tool_names"], task.get("tool_outputs")),
+                "input_params": task.get("input_params") or [],
+                "output_params": task.get("output_params") or []
+            }
+        if not rows:
+            return []
+
+        # Find existing tasks and missing tools for all rows in one round trip
+        records = self.neo4j_manager.run_read(
+            _CYPHER_CREATE_TASKS_BULK_PROBE,
+            rows=list(rows.values())
+        )
+
+        results = {}
+        missing_tools = set()
+        for record in records:
+            if record["task"] is not None:
+                results[record["name"]] = record["task"]
+            else:
+                missing_tools.update(record["missing_tools"])
+
+        if missing_tools:
+            raise ValueError(f"The following tools do not exist: {', '.join(sorted(missing_tools))}")
+
+        new_rows = [row for name, row in rows.items() if name not in results]
+        if new_rows:
+            embeddings = self.retriever_manager.embed_documents(
+                [f"{row['name']} {row['description']}" for row in new_rows]
             )
-            
-            record = result.single()
-            return self._filter_node_info(record["task"]) if record else None
+            for row, embedding in zip(new_rows, embeddings):
+                row["embedding"] = embedding
+
+            records = self.neo4j_manager.run_write(
+                _CYPHER_CREATE_TASKS_BULK,
+                rows=new_rows
+            )
+            for record in records:
+                task = record["task"]
+                results[task["name"]] = task
+
+        return [results.get(task["name"]) for task in tasks]
 
     def update_task(self, name: str, description: str = None, tool_names: List[str] = None,
-                   input_params: List[str] = None, output_params: List[str] = None) -> Dict:
+                   input_params: List[str] = None, output_params: List[str] = None,
+                   tool_outputs: Dict[str, List[str]] = None) -> Dict:
         """Update existing task properties and tool associations
-        
+
         Args:
             name: Task name
             description: Task description
             tool_names: List of tool names
             input_params: List of required input parameter names
             output_params: List of output parameter names to return
+            tool_outputs: Optional mapping of tool name to the result keys it provides;
+                applied together with tool_names
         """
-        with self.neo4j_manager.get_session() as session:
-            # Check if task exists
-            exists = session.run("""
-                MATCH (task:Task {name: $name})
-                RETURN count(task) > 0 as exists
-                """,
-                name=name
-            ).single()["exists"]
-            
-            if not exists:
-                raise ValueError(f"Task {name} does not exist")
-            
-            # Check if all tools exist if tool_names provided
-            if tool_names:
-                missing_tools = []
-                for tool_name in tool_names:
-                    tool_exists = session.run("""
-                        MATCH (tool:Tool {name: $tool_name})
-                        RETURN count(tool) > 0 as exists
-                        """,
-                        tool_name=tool_name
-                    ).single()["exists"]
-                    
-                    if not tool_exists:
-                        missing_tools.append(tool_name)
-                
-                if missing_tools:
-                    raise ValueError(f"The following tools do not exist: {', '.join(missing_tools)}")
-            
-            # Update task properties
-            update_query = """
-                MATCH (task:Task {name: $name})
-            """
-            
-            if description or tool_names or input_params is not None or output_params is not None:
-                update_query += "SET "
-                updates = []
-                
-                if description:
-                    updates.append("task.description = $description")
-                    # Update embedding if description changes
-                    embedding = self.retriever_manager.embedder.embed_query(f"{name} {description}")
-                    updates.append("task.embedding = $embedding")
-                
-                if input_params is not None:
-                    updates.append("task.input_params = $input_params")
-                
-                if output_params is not None:
-                    updates.append("task.output_params = $output_params")
-                
-                update_query += ", ".join(updates)
-            
-            if tool_names:
-                update_query += """
-                WITH task
-                MATCH (task)-[r:USES]->(:Tool)
-                DELETE r
-                WITH task
-                UNWIND range(0, size($tool_names)-1) as idx
-                WITH task, $tool_names[idx] as tool_name, idx
-                MATCH (tool:Tool {name: tool_name})
-                MERGE (task)-[:USES {order: idx}]->(tool)
-                """
-            
-            update_query += " RETURN task"
-            
-            result = session.run(
-                update_query,
+        # Parameter-only updates need no tool validation or embedding, so they
+        # skip the probe and the write itself reports a missing task
+        description_changed = False
+        if description or tool_names or (input_params is None and output_params is None):
+            # Check the task, its current description and any missing tools in one read
+            records = self.neo4j_manager.run_read(
+                _CYPHER_UPDATE_TASK_PROBE,
                 name=name,
-                description=description,
-                tool_names=tool_names,
-                input_params=input_params,
-                output_params=output_params,
-                embedding=embedding if description else None
+                tool_names=tool_names or []
             )
-            
-            record = result.single()
-            return self._filter_node_info(record["task"]) if record else None
 
-    def execute_task(self, task_name: str, context_variables: Dict[str, Any] = None) -> Dict[str, Any]:
+            if not records:
+                raise ValueError(f"Task {name} does not exist")
+
+            missing_tools = records[0]["missing_tools"]
+            if missing_tools:
+                raise ValueError(f"The following tools do not exist: {', '.join(missing_tools)}")
+
+            # Only re-embed when the description actually changes
+            description_changed = bool(description) and description != records[0]["task"]["description"]
+            if not (description_changed or tool_names or input_params is not None
+                    or output_params is not None):
+                # Nothing to change; skip the embedding and the write
+                return records[0]["task"]
+        embedding = self.retriever_manager.embed_query(f"{name} {description}") if description_changed else None
+
+        # Update properties and tool associations in a single write; null
+        # parameters leave the corresponding property untouched
+        records = self.neo4j_manager.run_write(
+            _CYPHER_UPDATE_TASK,
+            name=name,
+            description=description if description_changed else None,
+            embedding=embedding,
+            tool_entries=self._tool_entries(tool_names, tool_outputs) if tool_names else None,
+            input_params=input_params,
+            output_params=output_params
+        )
+
+        if not records:
+            raise ValueError(f"Task {name} does not exist")
+        return records[0]["task"]
+
+    def execute_task(self, task_name: str, context_variables: Dict[str, Any] = None,
+                     concurrent: bool = False) -> Dict[str, Any]:
         """Execute task by running all associated tools in order
-        
+
         Args:
             task_name: Task name
             context_variables: Context variables
-            
+            concurrent: Run consecutive tools in parallel threads when none of them
+                reads a variable, required or optional, that an earlier tool in the same
+                batch may set. Results are merged in task order, so the outputs match
+                sequential execution.
+
         Returns:
             Dict[str, Any]: Task execution results containing:
                 - results: All tool execution results
@@ -191,211 +378,398 @@ class TaskManager:
         """
         if context_variables is None:
             context_variables = {}
-            
-        with self.neo4j_manager.get_session() as session:
-            # Get task and its tools in order
-            result = session.run("""
-                MATCH (task:Task {name: $task_name})-[r:USES]->(tool:Tool)
-                WITH task, tool ORDER BY r.order
-                WITH task, collect(tool) as tools
-                RETURN task, tools
-                LIMIT 1
-                """,
-                task_name=task_name
-            ).single()
-            
-            if not result:
-                raise ValueError(f"Task '{task_name}' not found")
-                
-            task = result["task"]
-            tools = result["tools"]
-            
-            if not tools:
-                raise ValueError(f"Task '{task_name}' has no associated tools")
-            
-            # Validate required input parameters
-            input_params = task.get("input_params", [])
-            missing_inputs = [param for param in input_params if param not in context_variables]
-            if missing_inputs:
-                raise ValueError(f"Missing required task input parameters: {', '.join(missing_inputs)}")
-            
-            # Execute tools in order
-            results = {}
-            context_variables = context_variables or {}
-            
-            for tool in tools:
+
+        # Get task and its tools in order
+        records = self.neo4j_manager.run_read(
+            _CYPHER_EXECUTE_TASK,
+            task_name=task_name
+        )
+
+        if not records:
+            raise ValueError(f"Task '{task_name}' not found")
+
+        task = records[0]["task"]
+        tools = records[0]["tools"]
+
+        if not tools:
+            raise ValueError(f"Task '{task_name}' has no associated tools")
+
+        # Validate required input parameters
+        input_params = task["input_params"] or []
+        missing_inputs = [param for param in input_params if param not in context_variables]
+        if missing_inputs:
+            raise ValueError(f"Missing required task input parameters: {', '.join(missing_inputs)}")
+
+        # Fail before running any tool if a later one can never get its parameters
+        self._check_tool_chain(tools, context_variables)
+
+        # Execute tools in order
+        results = {}
+
+        index = 0
+        while index < len(tools):
+            # Each batch starts with the next tool; in concurrent mode, following
+            # tools join it while they read none of the variables it may set
+            batch = []
+            batch_keys = set()
+            for tool in tools[index:]:
                 try:
-                    # Get tool category and name
-                    category = tool['category']
-                    tool_name = tool['name']
-                    
-                    # Get tool function from tool manager
-                    tool_function = self.tool_manager.get_tool_function(tool_name)
-                    
-                    # Get function parameters
-                    sig = inspect.signature(tool_function)
-                    tool_params = {}
-                    
-                    # Check for required parameters and build tool_params
-                    missing_params = []
-                    for param_name, param in sig.parameters.items():
-                        if param_name in context_variables:
-                            tool_params[param_name] = context_variables[param_name]
-                        elif param.default == param.empty:  # Parameter is required
-                            missing_params.append(param_name)
-                    
-                    if missing_params:
-                        raise ValueError(f"Missing required parameters for tool '{tool_name}': {', '.join(missing_params)}")
-                    
-                    # Execute tool function with matched parameters
-                    print(f"Executing {category}: {tool_name} with params: {tool_params}")  # Debug output
-                    result = tool_function(**tool_params)
-                    results[tool_name] = result
-                    
-                    # Update context variables for next tool
-                    if isinstance(result, dict):
-                        context_variables.update(result)
-                    else:
-                        # If result is not a dict, store it with the tool name as key
-                        context_variables[tool_name] = result
-                        
-                        # Get the return annotation from the function if available
-                        return_annotation = inspect.signature(tool_function).return_annotation
-                        if return_annotation != inspect.Signature.empty:
-                            # If the return annotation is a string, use it as the variable name
-                            if isinstance(return_annotation, str):
-                                context_variables[return_annotation] = result
-                        
-                        # If no return annotation, try to infer from docstring
-                        docstring = inspect.getdoc(tool_function)
-                        if docstring:
-                            # Look for "Returns:" section in docstring
-                            lines = docstring.split('\n')
-                            for i, line in enumerate(lines):
-                                if 'Returns:' in line and i + 1 < len(lines):
-                                    # Next line might contain the return variable name
-                                    return_desc = lines[i + 1].strip()
-                                    # Try to extract variable name from description
-                                    if ':' in return_desc:
-                                        var_name = return_desc.split(':')[0].strip()
-                                        context_variables[var_name] = result
-                                    break
-                        
-                    print(f"Updated context: {context_variables}")  # Debug output
-                        
+                    tool_function, tool_params, missing_params = self._prepare_tool_call(tool, context_variables)
+                    if missing_params and not batch:
+                        raise ValueError(f"Missing required parameters for tool '{tool['name']}': {', '.join(missing_params)}")
                 except Exception as e:
-                    print(f"Error executing {tool_name}: {str(e)}")  # Debug output
-                    raise RuntimeError(f"Error executing tool '{tool_name}': {str(e)}")
-            
-            # Extract specified output parameters
-            output_params = task.get("output_params", [])
-            missing_outputs = [param for param in output_params if param not in context_variables]
-            if missing_outputs:
-                raise ValueError(f"Required output parameters not found in results: {', '.join(missing_outputs)}")
-                
-            outputs = {param: context_variables[param] 
-                      for param in output_params 
-                      if param in context_variables}
-            
-            return {
-                "results": results,
-                "outputs": outputs,
-                "context_variables": context_variables
-            }
+                    if batch:
+                        break
+                    logger.debug("Error executing %s: %s", tool['name'], e)
+                    raise RuntimeError(f"Error executing tool '{tool['name']}': {str(e)}")
+                _, param_names = self._tool_param_cache[(tool['category'], tool['name'])]
+                if missing_params or not batch_keys.isdisjoint(param_names):
+                    break
+                batch.append((tool, tool_function, tool_params))
+                if not concurrent:
+                    break
+                result_keys = self._result_keys(tool)
+                if result_keys is None:
+                    # A dict of arbitrary keys may set any parameter of a later tool
+                    break
+                batch_keys.update(result_keys)
+            index += len(batch)
+
+            if len(batch) == 1:
+                batch_results = [self._run_tool(*batch[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                    futures = [executor.submit(self._run_tool, *call) for call in batch]
+                    batch_results = [future.result() for future in futures]
+
+            # Merge results in task order so later tools win, as in sequential execution
+            for (tool, tool_function, _), result in zip(batch, batch_results):
+                results[tool['name']] = result
+                self._apply_tool_result(tool, tool_function, result, context_variables)
+            logger.debug("Updated context: %s", context_variables)
+
+        # Extract specified output parameters
+        output_params = task["output_params"] or []
+        missing_outputs = [param for param in output_params if param not in context_variables]
+        if missing_outputs:
+            raise ValueError(f"Required output parameters not found in results: {', '.join(missing_outputs)}")
+
+        outputs = {param: context_variables[param]
+                  for param in output_params
+                  if param in context_variables}
+
+        return {
+            "results": results,
+            "outputs": outputs,
+            "context_variables": context_variables
+        }
+
+    def _prepare_tool_call(self, tool, context_variables: Dict[str, Any]):
+        """Resolve a tool's function and match its parameters against the context
+
+        Returns:
+            Tuple of (tool function, matched parameters, missing required parameter names)
+        """
+        tool_function, _ = self._resolve_tool(tool)
+        required_params, param_names = self._tool_param_cache[(tool['category'], tool['name'])]
+        tool_params = {param_name: context_variables[param_name]
+                       for param_name in param_names if param_name in context_variables}
+        missing_params = [param_name for param_name in required_params
+                          if param_name not in context_variables]
+        return tool_function, tool_params, missing_params
+
+    def _check_tool_chain(self, tools, context_variables: Dict[str, Any]):
+        """Check that every tool's required parameters can be provided
+
+        Parameters come from the context or from the result keys of earlier
+        tools (see _result_keys). A tool that may return a dict of arbitrary
+        keys can provide any parameter, so tools after it are not checked.
+
+        Raises:
+            RuntimeError: If a tool cannot be loaded or a required parameter
+                cannot be provided, as execute_task raises for the tool itself
+        """
+        available = set(context_variables)
+        for tool in tools:
+            try:
+                self._resolve_tool(tool)
+            except Exception as e:
+                raise RuntimeError(f"Error executing tool '{tool['name']}': {str(e)}")
+            required_params, _ = self._tool_param_cache[(tool['category'], tool['name'])]
+            missing_params = [param_name for param_name in required_params
+                              if param_name not in available]
+            if missing_params:
+                raise RuntimeError(f"Error executing tool '{tool['name']}': Missing required parameters "
+                                   f"for tool '{tool['name']}': {', '.join(missing_params)}")
+            result_keys = self._result_keys(tool)
+            if result_keys is None:
+                return
+            available.update(result_keys)
+
+    def _result_keys(self, tool):
+        """Get the context variables a tool's result can set
+
+        A dict result sets its declared output keys, or all of its keys when the
+        task declares none; any other result sets the tool name, a string return
+        annotation and the "Returns:" docstring name.
+
+        Returns:
+            Set of variable names, or None if the tool may return a dict of arbitrary keys
+        """
+        key = (tool['category'], tool['name'])
+        return_annotation = self._tool_sig_cache[key].return_annotation
+        outputs = tool.get('outputs')
+        if outputs is None and self._may_return_dict(return_annotation):
+            return None
+        result_keys = {tool['name']}
+        if outputs:
+            result_keys.update(outputs)
+        if isinstance(return_annotation, str):
+            result_keys.add(return_annotation)
+        var_name = self._tool_return_name_cache[key]
+        if var_name:
+            result_keys.add(var_name)
+        return result_keys
+
+    @staticmethod
+    def _may_return_dict(annotation) -> bool:
+        """Check whether a return annotation allows a dict result
+
+        Missing annotations, string annotations (which name the result
+        variable instead of its type) and Any allow any result.
+        """
+        if annotation is inspect.Signature.empty or annotation is Any or isinstance(annotation, str):
+            return True
+        if annotation is None:
+            return False
+        origin = typing.get_origin(annotation) or annotation
+        if origin is Union or origin is types.UnionType:
+            return any(TaskManager._may_return_dict(arg) for arg in typing.get_args(annotation))
+        return not isinstance(origin, type) or issubclass(origin, Mapping)
+
+    def _resolve_tool(self, tool):
+        """Look up a tool's function and signature, loading them on first use
+
+        Returns:
+            Tuple of (tool function, signature)
+        """
+        key = (tool['category'], tool['name'])
+        tool_function = self._tool_fn_cache.get(key)
+        if tool_function is None:
+            tool_function = self.tool_manager.load_tool_function(tool['name'], tool['category'])
+            sig = self._tool_sig_cache[key] = inspect.signature(tool_function)
+            self._tool_param_cache[key] = (
+                tuple(param_name for param_name, param in sig.parameters.items()
+                      if param.default == param.empty),  # Required parameters
+                tuple(sig.parameters)
+            )
+            self._tool_return_name_cache[key] = self._docstring_return_name(tool_function)
+            self._tool_fn_cache[key] = tool_function
+        return tool_function, self._tool_sig_cache[key]
+
+    def _run_tool(self, tool, tool_function, tool_params: Dict[str, Any]):
+        """Call a tool function with its matched parameters"""
+        try:
+            logger.debug("Executing %s: %s with params: %s", tool['category'], tool['name'], tool_params)
+            return tool_function(**tool_params)
+        except Exception as e:
+            logger.debug("Error executing %s: %s", tool['name'], e)
+            raise RuntimeError(f"Error executing tool '{tool['name']}': {str(e)}")
+
+    def _apply_tool_result(self, tool, tool_function, result, context_variables: Dict[str, Any]):
+        """Merge a tool's result into the context variables for the next tools"""
+        if isinstance(result, dict):
+            outputs = tool.get('outputs')
+            if outputs is None:
+                context_variables.update(result)
+            else:
+                # Only the keys declared for this tool reach the context
+                for key in outputs:
+                    if key in result:
+                        context_variables[key] = result[key]
+            return
+
+        # If result is not a dict, store it with the tool name as key
+        context_variables[tool['name']] = result
+
+        # Get the return annotation from the function if available
+        key = (tool['category'], tool['name'])
+        return_annotation = self._tool_sig_cache[key].return_annotation
+        if return_annotation != inspect.Signature.empty:
+            # If the return annotation is a string, use it as the variable name
+            if isinstance(return_annotation, str):
+                context_variables[return_annotation] = result
+
+        # If no return annotation, try to infer from docstring
+        var_name = self._tool_return_name_cache[key]
+        if var_name:
+            context_variables[var_name] = result
+
+    @staticmethod
+    def _docstring_return_name(tool_function):
+        """Get the variable name declared in a "Returns:" docstring section, if any"""
+        docstring = inspect.getdoc(tool_function)
+        if docstring:
+            # Look for "Returns:" section in docstring
+            lines = docstring.split('\n')
+            for i, line in enumerate(lines):
+                if 'Returns:' in line and i + 1 < len(lines):
+                    # Next line might contain the return variable name
+                    return_desc = lines[i + 1].strip()
+                    # Try to extract variable name from description
+                    if ':' in return_desc:
+                        return return_desc.split(':')[0].strip()
+                    break
+        return None
 
     def get_task(self, task_name: str) -> Dict:
         """Get task details"""
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (task:Task {name: $task_name})-[r:USES]->(tool:Tool)
-                WITH task, tool ORDER BY r.order
-                WITH task, collect(tool) as tools
-                RETURN task, tools
-                LIMIT 1
-                """,
-                task_name=task_name
-            ).single()
-            
-            if not result:
-                return None
-                
-            task = result["task"]
-            task["tools"] = result["tools"]
-            return self._filter_node_info(task)
+        # Shape the result on the server; the projection leaves out embeddings
+        records = self.neo4j_manager.run_read(
+            _CYPHER_GET_TASK,
+            task_name=task_name
+        )
+
+        return records[0]["task"] if records else None
 
     def get_task_parameters(self, task_name: str) -> Dict[str, List[str]]:
         """Get task's defined input and output parameters
-        
+
         Args:
             task_name: Task name
-            
+
         Returns:
             Dict containing:
                 - input_params: List of required input parameter names
                 - output_params: List of output parameter names
         """
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (task:Task {name: $task_name})
-                RETURN task
-                LIMIT 1
-                """,
-                task_name=task_name
-            ).single()
-            
-            if not result:
-                raise ValueError(f"Task '{task_name}' not found")
-                
-            task = result["task"]
-            return {
-                "input_params": task.get("input_params", []),
-                "output_params": task.get("output_params", [])
-            }
+        records = self.neo4j_manager.run_read(
+            _CYPHER_GET_TASK_PARAMETERS,
+            task_name=task_name
+        )
 
-    def list_tasks(self) -> list:
-        """List all tasks"""
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (task:Task)-[r:USES]->(tool:Tool)
-                WITH task, tool ORDER BY r.order
-                WITH task, collect(tool) as tools
-                RETURN task, tools
-                ORDER BY task.name
-                """)
-            
-            tasks = []
-            for record in result:
-                task = record["task"]
-                task["tools"] = record["tools"]
-                tasks.append(self._filter_node_info(task))
-            return tasks
+        if not records:
+            raise ValueError(f"Task '{task_name}' not found")
+
+        record = records[0]
+        return {
+            "input_params": record["input_params"] or [],
+            "output_params": record["output_params"] or []
+        }
+
+    def list_tasks(self, include_embedding: bool = False) -> list:
+        """List all tasks
+
+        Args:
+            include_embedding: Also return each task's embedding vector
+        """
+        records = self.neo4j_manager.run_read(
+            _CYPHER_LIST_TASKS_WITH_EMBEDDING if include_embedding else _CYPHER_LIST_TASKS
+        )
+
+        return [record["task"] for record in records]
+
+    def iter_tasks(self, include_embedding: bool = False) -> Iterator[Dict]:
+        """Iterate over all tasks as the database streams them
+
+        Unlike list_tasks, tasks are not collected into a list first, and
+        stopping early leaves the remaining records unfetched.
+
+        Args:
+            include_embedding: Also return each task's embedding vector
+        """
+        records = self.neo4j_manager.iter_read(
+            _CYPHER_LIST_TASKS_WITH_EMBEDDING if include_embedding else _CYPHER_LIST_TASKS
+        )
+        for record in records:
+            yield record["task"]
 
     def delete_task(self, task_name: str):
         """Delete unused task"""
-        with self.neo4j_manager.get_session() as session:
-            # Check if task is used in any workflow
-            used = session.run("""
-                MATCH (w:Workflow)-[:CONTAINS]->(t:Task {name: $task_name})
-                RETURN count(w) > 0 as used
-                """,
-                task_name=task_name
-            ).single()["used"]
-            
-            if used:
-                raise ValueError(f"Cannot delete task '{task_name}' as it is used in one or more workflows")
-            
-            # Delete task if not used
-            session.run("""
-                MATCH (t:Task {name: $task_name})
-                DETACH DELETE t
-                """,
-                task_name=task_name
-            )
+        # Check workflow usage and delete in the same transaction, so no workflow
+        # can start using the task in between
+        records = self.neo4j_manager.run_write(
+            _CYPHER_DELETE_TASK,
+            task_name=task_name
+        )
 
-    def _filter_node_info(self, node_info):
-        """Filter out embedding from node info for display purposes"""
-        if not node_info:
-            return None
-        if isinstance(node_info, list):
-            return [{k: v for k, v in node.items() if k != 'embedding'} for node in node_info]
-        return {k: v for k, v in node_info.items() if k != 'embedding'}
+        if records and records[0]["uses"] > 0:
+            raise ValueError(f"Cannot delete task '{task_name}' as it is used in one or more workflows")
+
+    @staticmethod
+    def _tool_entries(tool_names: List[str], tool_outputs: Dict[str, List[str]] = None) -> List[Dict]:
+        """Pair each tool name with its position and declared result keys for the USES link"""
+        tool_outputs = tool_outputs or {}
+        return [{"name": tool_name, "order": order, "outputs": tool_outputs.get(tool_name)}
+                for order, tool_name in enumerate(tool_names)]
+
+
+class AsyncTaskManager:
+    """Awaitable front-end for TaskManager
+
+    Each call runs the synchronous TaskManager method in a worker thread, so
+    independent operations can be awaited together with asyncio.gather while
+    sharing the driver's connection pool. The sync driver releases the GIL on
+    network I/O and embedding requests, so those calls overlap.
+    """
+
+    def __init__(self, task_manager: TaskManager):
+        self.task_manager = task_manager
+
+    async def create_task(self, name: str, description: str, tool_names: List[str],
+                          input_params: List[str] = None, output_params: List[str] = None,
+                          tool_outputs: Dict[str, List[str]] = None) -> Dict:
+        """Create a new task and associate with tools"""
+        return await asyncio.to_thread(self.task_manager.create_task, name, description, tool_names,
+                                       input_params, output_params, tool_outputs)
+
+    async def create_tasks_bulk(self, tasks: List[Dict]) -> List[Dict]:
+        """Create several tasks with batched queries"""
+        return await asyncio.to_thread(self.task_manager.create_tasks_bulk, tasks)
+
+    async def update_task(self, name: str, description: str = None, tool_names: List[str] = None,
+                          input_params: List[str] = None, output_params: List[str] = None,
+                          tool_outputs: Dict[str, List[str]] = None) -> Dict:
+        """Update existing task properties and tool associations"""
+        return await asyncio.to_thread(self.task_manager.update_task, name, description, tool_names,
+                                       input_params, output_params, tool_outputs)
+
+    async def execute_task(self, task_name: str, context_variables: Dict[str, Any] = None,
+                           concurrent: bool = False) -> Dict[str, Any]:
+        """Execute task by running all associated tools in order"""
+        return await asyncio.to_thread(self.task_manager.execute_task, task_name, context_variables,
+                                       concurrent)
+
+    async def get_task(self, task_name: str) -> Dict:
+        """Get task details"""
+        return await asyncio.to_thread(self.task_manager.get_task, task_name)
+
+    async def get_task_parameters(self, task_name: str) -> Dict[str, List[str]]:
+        """Get task's defined input and output parameters"""
+        return await asyncio.to_thread(self.task_manager.get_task_parameters, task_name)
+
+    async def list_tasks(self, include_embedding: bool = False) -> list:
+        """List all tasks"""
+        return await asyncio.to_thread(self.task_manager.list_tasks, include_embedding)
+
+    async def iter_tasks(self, include_embedding: bool = False) -> AsyncIterator[Dict]:
+        """Iterate over all tasks as the database streams them
+
+        Each record is fetched in a worker thread, one at a time, so the
+        streaming session is never used by two threads at once.
+        """
+        tasks = self.task_manager.iter_tasks(include_embedding)
+        done = object()
+        try:
+            while True:
+                task = await asyncio.to_thread(next, tasks, done)
+                if task is done:
+                    return
+                yield task
+        finally:
+            # Stopping early closes the session and leaves the remaining records unfetched
+            await asyncio.to_thread(tasks.close)
+
+    async def delete_task(self, task_name: str):
+        """Delete unused task"""
+        await asyncio.to_thread(self.task_manager.delete_task, task_name)
@@ -1,11 +1,157 @@
 from typing import Dict
-from .merkle_tree import MerkleTree, MerkleNode
+from .merkle_tree import MerkleTree, MerkleNode, STATE_VERSION
 import os
-import ast
-import time
 import json
 import importlib
 import sys
+import logging
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Category of tools created without one. A category names the tool module
+# relative to tools_dir with dots: "<directory>.<module>" is
+# tools_dir/<directory>/<module>.py, and a single name is a module directly in tools_dir
+DEFAULT_CATEGORY = 'uncategorized'
+
+# search_tools re-ranks this many vector index candidates per requested result
+SEARCH_CANDIDATE_FACTOR = 4
+
+# Cypher statements are module constants so every call sends the identical
+# text and reuses the server's cached query plan
+_CYPHER_CREATE_TOOL_PROBE = """
+MATCH (tool:Tool {name: $name})
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_CREATE_TOOL = """
+MERGE (tool:Tool {name: $name})
+SET tool.description = $description,
+    tool.category = $category,
+    tool.embedding = $embedding
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_CREATE_TOOLS_BULK_PROBE = """
+UNWIND $names as name
+MATCH (tool:Tool {name: name})
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_CREATE_TOOLS_BULK = """
+UNWIND $rows as row
+MERGE (tool:Tool {name: row.name})
+ON CREATE SET tool.description = row.description,
+              tool.category = row.category,
+              tool.embedding = row.embedding
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_GET_TOOL_DESCRIPTION = """
+MATCH (tool:Tool {name: $name})
+RETURN tool.description AS description
+"""
+
+_CYPHER_UPDATE_TOOL = """
+MATCH (tool:Tool {name: $name})
+SET tool.embedding = CASE WHEN $embedding IS NULL THEN tool.embedding ELSE $embedding END
+SET tool.description = CASE WHEN $description IS NULL THEN tool.description ELSE $description END
+SET tool.category = CASE WHEN $category IS NULL THEN tool.category ELSE $category END
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_GET_TOOL = """
+MATCH (tool:Tool {name: $name})
+RETURN tool
+LIMIT 1
+"""
+
+_CYPHER_GET_TOOL_CATEGORY = """
+MATCH (tool:Tool {name: $name})
+RETURN tool.category as category
+"""
+
+_CYPHER_LOAD_MERKLE_STATE = """
+OPTIONAL MATCH (merkle:FileMerkleTree)
+WITH merkle LIMIT 1
+RETURN merkle.hash_algorithm as hash_algorithm,
+       merkle.state as state,
+       COLLECT { MATCH (leaf:FileLeaf) RETURN leaf {.*} } as leaves
+"""
+
+_CYPHER_REMOVE_TOOL = """
+MATCH (tool:Tool {name: $name})
+DELETE tool
+"""
+
+_CYPHER_REMOVE_TOOLS = """
+UNWIND $names as name
+MATCH (tool:Tool {name: name})
+DELETE tool
+"""
+
+_CYPHER_GET_TOOL_DESCRIPTIONS = """
+UNWIND $names as name
+MATCH (tool:Tool {name: name})
+RETURN tool.name as name, tool.description as description
+"""
+
+_CYPHER_UPSERT_TOOLS = """
+UNWIND $rows as row
+MERGE (tool:Tool {name: row.name})
+SET tool.description = row.description,
+    tool.category = row.category,
+    tool.embedding = coalesce(row.embedding, tool.embedding)
+"""
+
+_CYPHER_SAVE_MERKLE_LEAVES = """
+MERGE (merkle:FileMerkleTree)
+SET merkle.hash_algorithm = $hash_algorithm
+REMOVE merkle.state
+WITH merkle
+CALL {
+    UNWIND $removed as path
+    MATCH (leaf:FileLeaf {path: path})
+    DELETE leaf
+}
+CALL {
+    UNWIND $leaves as row
+    MERGE (leaf:FileLeaf {path: row.path})
+    SET leaf += row
+}
+"""
+
+_CYPHER_LIST_TOOLS = """
+MATCH (tool:Tool)
+RETURN tool {.name, .description, .category} AS tool
+"""
+
+_CYPHER_SEARCH_TOOLS = """
+CALL db.index.vector.queryNodes('toolEmbedding', $candidates, $embedding)
+YIELD node AS tool, score AS vector_score
+WITH tool, vector_score,
+     CASE
+         WHEN tool.description CONTAINS $query_text THEN 1.0
+         WHEN tool.name CONTAINS $query_text THEN 0.8
+         ELSE 0.0
+     END as text_score
+WITH tool,
+     (vector_score + text_score) / 2 as hybrid_score
+ORDER BY hybrid_score DESC
+LIMIT $limit
+RETURN tool
+"""
+
+_CYPHER_LIST_TOOL_DESCRIPTIONS = """
+MATCH (tool:Tool)
+RETURN tool.name as name, tool.description as description,
+       tool.category as category
+"""
 
 class ToolManager:
     def __init__(self, neo4j_manager, retriever_manager, tools_dir: str):
@@ -19,12 +165,17 @@ class ToolManager:
         self.neo4j_manager = neo4j_manager
         self.retriever_manager = retriever_manager
         self.tools_dir = tools_dir
+        # Serializes Merkle tree updates between callers and the watchdog thread
+        self._scan_lock = threading.RLock()
         
         # Create tools directory if it doesn't exist
         os.makedirs(self.tools_dir, exist_ok=True)
         
-        # Initialize Merkle tree for file tracking
-        self.merkle_tree = MerkleTree(self.tools_dir)
+        # Initialize Merkle tree for file tracking; it is built by the initial
+        # scan, which only hashes files changed since the saved state
+        self.merkle_tree = MerkleTree(self.tools_dir, build=False)
+        # Path -> file node as last saved in database; None while no leaves are saved
+        self._saved_leaves = None
         self._load_merkle_state()
         
         # Initialize watchdog observer and perform initial scan
@@ -32,7 +183,7 @@ class ToolManager:
         self._setup_file_watcher()
         self.scan_tools()  # Initial scan
 
-    def create_tool(self, name: str, description: str, category: str = 'uncategorized') -> Dict:
+    def create_tool(self, name: str, description: str, category: str = DEFAULT_CATEGORY) -> Dict:
         """Create a new tool or return existing one
         
         Args:
@@ -40,48 +191,93 @@ class ToolManager:
             description: Tool description
             category: Tool category (will be created if doesn't exist)
         """
-        print(f"Creating tool: {name} ({category})")
+        logger.debug("Creating tool: %s (%s)", name, category)
         # Create category directory if it doesn't exist
-        category_name, tool_file = category.split('.')
-        category_dir = os.path.join(self.tools_dir, category_name)
+        category_dir, _ = self._category_paths(category)
         os.makedirs(category_dir, exist_ok=True)
         
-        with self.neo4j_manager.get_session() as session:
-            # Check if tool exists
-            existing_tool = session.run("""
-                MATCH (tool:Tool {name: $name})
-                RETURN tool
-                LIMIT 1
-                """,
-                name=name
-            ).single()
-            
-            if existing_tool:
-                return existing_tool["tool"]
-            
-            # Create embedding vector
-            embedding = self.retriever_manager.embedder.embed_query(f"{name} {description}")
-            
-            # Create new tool
-            result = session.run("""
-                MERGE (tool:Tool {name: $name})
-                SET tool.description = $description,
-                    tool.category = $category,
-                    tool.embedding = $embedding
-                RETURN tool
-                """,
-                name=name,
-                description=description,
-                category=category,
-                embedding=embedding
+        # Check if tool exists
+        existing_tool = self.neo4j_manager.run_read(
+            _CYPHER_CREATE_TOOL_PROBE,
+            name=name
+        )
+
+        if existing_tool:
+            return existing_tool[0]["tool"]
+
+        # Create embedding vector
+        embedding = self.retriever_manager.embed_query(f"{name} {description}")
+
+        # Create new tool
+        records = self.neo4j_manager.run_write(
+            _CYPHER_CREATE_TOOL,
+            name=name,
+            description=description,
+            category=category,
+            embedding=embedding
+        )
+
+        tool = records[0]["tool"] if records else None
+        logger.debug("Created tool: %s", tool)
+        return tool
+
+    def create_tools_bulk(self, tools: list) -> list:
+        """Create several tools with one embeddings request and one write
+
+        Args:
+            tools: List of dicts with the create_tool arguments (name, description
+                and optionally category)
+
+        Returns:
+            List with one tool info per input entry, in input order; existing tools
+            are returned unchanged. Only the first entry of a repeated name is
+            created, and every entry with that name gets its tool.
+        """
+        rows = {}
+        for tool in tools:
+            if tool["name"] in rows:
+                logger.warning("Tool '%s' is listed more than once, only its first entry is created", tool["name"])
+                continue
+            rows[tool["name"]] = {
+                "name": tool["name"],
+                "description": tool["description"],
+                "category": tool.get("category", DEFAULT_CATEGORY)
+            }
+        if not rows:
+            return []
+
+        # Validate every category before anything is written
+        category_dirs = {self._category_paths(row["category"])[0] for row in rows.values()}
+
+        # Create category directories if they don't exist
+        for category_dir in category_dirs:
+            os.makedirs(category_dir, exist_ok=True)
+
+        # Find existing tools in one round trip
+        records = self.neo4j_manager.run_read(
+            _CYPHER_CREATE_TOOLS_BULK_PROBE,
+            names=list(rows)
+        )
+        results = {record["tool"]["name"]: record["tool"] for record in records}
+
+        new_rows = [row for name, row in rows.items() if name not in results]
+        if new_rows:
+            embeddings = self.retriever_manager.embed_documents(
+                [f"{row['name']} {row['description']}" for row in new_rows]
             )
+            for row, embedding in zip(new_rows, embeddings):
+                row["embedding"] = embedding
             
-            record = result.single()
-            
-            # Print tool info without embedding for cleaner output
-            tool_info = self._filter_tool_info(record['tool'] if record else None)
-            print(f"Created tool: {tool_info}")
-            return record["tool"] if record else None
+            # ON CREATE keeps a tool created concurrently since the probe unchanged
+            records = self.neo4j_manager.run_write(
+                _CYPHER_CREATE_TOOLS_BULK,
+                rows=new_rows
+            )
+            for record in records:
+                results[record["tool"]["name"]] = record["tool"]
+            logger.info("Created %s tools", len(new_rows))
+
+        return [results.get(tool["name"]) for tool in tools]
 
     def update_tool(self, name: str, description: str = None, category: str = None) -> Dict:
         """Update existing tool properties
@@ -91,135 +287,142 @@ class ToolManager:
             description: Tool description
             category: Tool category
         """
-        with self.neo4j_manager.get_session() as session:
-            # Check if tool exists
-            exists = session.run("""
-                MATCH (tool:Tool {name: $name})
-                RETURN count(tool) > 0 as exists
-                """,
+        # Only a changed description changes the embedding; category-only
+        # updates and unchanged descriptions keep the stored vector
+        embedding = None
+        if description is not None:
+            records = self.neo4j_manager.run_read(
+                _CYPHER_GET_TOOL_DESCRIPTION,
                 name=name
-            ).single()["exists"]
-            
-            if not exists:
-                raise ValueError(f"Tool '{name}' does not exist. Use create_tool to create new tools.")
-            
-            # Create new embedding vector
-            embedding = self.retriever_manager.embedder.embed_query(f"{name} {description if description else ''}")
-            
-            # Update tool properties
-            result = session.run("""
-                MATCH (tool:Tool {name: $name})
-                SET tool.embedding = $embedding
-                SET tool.description = CASE WHEN $description IS NULL THEN tool.description ELSE $description END
-                SET tool.category = CASE WHEN $category IS NULL THEN tool.category ELSE $category END
-                RETURN tool
-                LIMIT 1
-                """,
-                name=name,
-                description=description,
-                category=category,
-                embedding=embedding
             )
-            
-            record = result.single()
-            return record["tool"] if record else None
+            if records and records[0]["description"] != description:
+                embedding = self.retriever_manager.embed_query(f"{name} {description}")
+
+        # Update tool properties
+        records = self.neo4j_manager.run_write(
+            _CYPHER_UPDATE_TOOL,
+            name=name,
+            description=description,
+            category=category,
+            embedding=embedding
+        )
+
+        # The update matches nothing when the tool does not exist
+        if not records:
+            raise ValueError(f"Tool '{name}' does not exist. Use create_tool to create new tools.")
+        return records[0]["tool"]
 
     def get_tool(self, name: str) -> Dict:
         """Get tool by name
         
         Args:
             name: Tool name
-            
+
         Returns:
             Tool dictionary or None if not found
         """
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (tool:Tool {name: $name})
-                RETURN tool
-                LIMIT 1
-            """, name=name)
-            record = result.single()
-            return record["tool"] if record else None
+        records = self.neo4j_manager.run_read(
+            _CYPHER_GET_TOOL,
+            name=name
+        )
+        return records[0]["tool"] if records else None
 
     def get_tool_function(self, tool_name: str):
         """Get tool function by name
         
         Args:
             tool_name: Name of the tool function
-            
+
         Returns:
             Function object
         """
         # Get tool info from database
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (tool:Tool {name: $name})
-                RETURN tool
-                """,
-                name=tool_name
-            ).single()
-            
-            if not result:
-                raise ValueError(f"Tool '{tool_name}' not found in database")
-                
-            tool = result['tool']
-            category = tool['category']
-            
-            # Split category to get directory and file names
-            category_name, module_name = category.split('.')
-            
-            # Construct module path
-            module_path = os.path.join(self.tools_dir, category_name, f"{module_name}.py")
-            module_path = os.path.normpath(module_path)
-            
-            if not os.path.exists(module_path):
-                raise ImportError(f"Tool module not found at {module_path}")
-                
-            # Import module
-            module_name = f"{category_name}.{module_name}"
-            if module_name in sys.modules:
-                module = sys.modules[module_name]
-            else:
-                spec = importlib.util.spec_from_file_location(module_name, module_path)
-                if not spec:
-                    raise ImportError(f"Failed to create module spec for {module_path}")
-                    
-                module = importlib.util.module_from_spec(spec)
-                if not module:
-                    raise ImportError(f"Failed to create module from spec for {module_path}")
-                    
-                sys.modules[module_name] = module
-                spec.loader.exec_module(module)
-            
-            # Get and return function
-            if not hasattr(module, tool_name):
-                raise AttributeError(f"Tool function '{tool_name}' not found in module {module_path}")
-                
-            return getattr(module, tool_name)
+        records = self.neo4j_manager.run_read(
+            _CYPHER_GET_TOOL_CATEGORY,
+            name=tool_name
+        )
 
-    def _load_merkle_state(self):
-        with self.neo4j_manager.get_session() as session:
-            # First, check if we have any state
-            result = session.run("""
-                MATCH (merkle:FileMerkleTree)
-                RETURN count(merkle) as count
-                """)
-            if result.single()["count"] == 0:
-                print("No previous Merkle tree state found")
-                return
+        if not records:
+            raise ValueError(f"Tool '{tool_name}' not found in database")
+
+        return self.load_tool_function(tool_name, records[0]['category'])
+
+    def load_tool_function(self, tool_name: str, category: str):
+        """Load a tool function from its category module without a database lookup
+
+        Args:
+            tool_name: Name of the tool function
+            category: Tool category ("<directory>.<module>" or "<module>")
+
+        Returns:
+            Function object
+        """
+        # Construct module path from the category
+        _, module_path = self._category_paths(category)
+        module_path = os.path.normpath(module_path)
+
+        if not os.path.exists(module_path):
+            raise ImportError(f"Tool module not found at {module_path}")
 
-            # Load existing state
-            result = session.run("""
-                MATCH (merkle:FileMerkleTree)
-                RETURN merkle.state as state
-                LIMIT 1
-                """)
-            record = result.single()
-            if record and record['state']:
-                # Parse JSON string back to dict
-                state_dict = json.loads(record['state'])
-                self.merkle_tree.load_state(state_dict)
+        # Import module
+        module_name = category
+        if module_name in sys.modules:
+            module = sys.modules[module_name]
+        else:
+            spec = importlib.util.spec_from_file_location(module_name, module_path)
+            if not spec:
+                raise ImportError(f"Failed to create module spec for {module_path}")
+
+            module = importlib.util.module_from_spec(spec)
+            if not module:
+                raise ImportError(f"Failed to create module from spec for {module_path}")
+
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+
+        # Get and return function
+        if not hasattr(module, tool_name):
+            raise AttributeError(f"Tool function '{tool_name}' not found in module {module_path}")
+
+        return getattr(module, tool_name)
+
+    def _category_paths(self, category: str) -> tuple:
+        """Get the directory and module path of a tool category
+
+        Args:
+            category: Tool category, the module path relative to tools_dir with
+                dots ("<directory>.<module>", or "<module>" for a module directly
+                in tools_dir), as assigned to scanned tools
+
+        Returns:
+            Tuple of (category directory, module file path)
+
+        Raises:
+            ValueError: If the category is empty or has an empty part
+        """
+        parts = category.split('.')
+        if not all(parts):
+            raise ValueError(f"Invalid tool category '{category}', expected '<directory>.<module>' or '<module>'")
+        category_dir = os.path.join(self.tools_dir, *parts[:-1])
+        return category_dir, os.path.join(category_dir, f"{parts[-1]}.py")
+
+    def _load_merkle_state(self):
+        # Load the saved file leaves; the tree is rebuilt from them in memory.
+        # States saved as a single JSON blob by older versions are still read.
+        records = self.neo4j_manager.run_read(_CYPHER_LOAD_MERKLE_STATE)
+        record = records[0] if records else None
+        if record and record['leaves']:
+            self.merkle_tree.load_leaves(record['leaves'], record['hash_algorithm'])
+            # 记录已保存的叶子，保存时只写入发生变化的文件
+            self._saved_leaves = self.merkle_tree.get_file_nodes()
+            self._saved_leaves.update((leaf['path'], None) for leaf in record['leaves']
+                                      if leaf['path'] not in self._saved_leaves)
+        elif record and record['state']:
+            # Parse JSON string back to dict
+            state_dict = orjson.loads(record['state']) if orjson else json.loads(record['state'])
+            self.merkle_tree.load_state(state_dict)
+        else:
+            logger.info("No previous Merkle tree state found")
 
     def _setup_file_watcher(self):
         """Setup watchdog observer to monitor file changes"""
@@ -229,36 +432,99 @@ class ToolManager:
         class ToolFileHandler(FileSystemEventHandler):
             def __init__(self, tool_manager):
                 self.tool_manager = tool_manager
-                self._last_scan = 0
-                self._scan_delay = 1  # Minimum seconds between scans
-                
+                self._scan_delay = 0.5  # Seconds without events before a path is processed
+                self._timers = {}
+                self._timers_lock = threading.Lock()
+
             def on_any_event(self, event):
-                # Skip non-Python files
-                if event.is_directory or not event.src_path.endswith('.py'):
+                # Reading a tool file (e.g. importing it) does not change it
+                if event.event_type in ('opened', 'closed_no_write'):
                     return
-                    
-                # Debounce scanning to avoid too frequent updates
-                current_time = time.time()
-                if current_time - self._last_scan >= self._scan_delay:
-                    self.tool_manager.scan_tools()
-                    self._last_scan = current_time
+                if event.is_directory:
+                    # The parent directory of every created, deleted, moved or saved
+                    # file also reports a modification; the file's own event covers it
+                    if event.event_type == 'modified':
+                        return
+                    # Directory changes may affect many files at once, fall back to a full scan
+                    self._schedule(None, self.tool_manager.scan_tools)
+                    return
+
+                # Update only the changed files
+                for path in (event.src_path, getattr(event, 'dest_path', '')):
+                    if path.endswith('.py'):
+                        self._schedule(path, self.tool_manager.scan_tool_file, path)
+
+            def _schedule(self, key, func, *args):
+                # An editor save emits several events; restarting the timer on
+                # each one processes the path once, after its last event
+                with self._timers_lock:
+                    timer = self._timers.pop(key, None)
+                    if timer is not None:
+                        timer.cancel()
+                    timer = threading.Timer(self._scan_delay, self._run, (key, func, args))
+                    timer.daemon = True
+                    self._timers[key] = timer
+                    timer.start()
+
+            def _run(self, key, func, args):
+                with self._timers_lock:
+                    self._timers.pop(key, None)
+                try:
+                    func(*args)
+                except Exception as e:
+                    logger.warning("Error processing tool file change: %s", e)
+
+            def cancel(self):
+                with self._timers_lock:
+                    for timer in self._timers.values():
+                        timer.cancel()
+                    self._timers.clear()
         
+        self._file_handler = ToolFileHandler(self)
         self.observer = watchdog.observers.Observer()
-        self.observer.schedule(ToolFileHandler(self), self.tools_dir, recursive=True)
+        self.observer.schedule(self._file_handler, self.tools_dir, recursive=True)
         self.observer.start()
 
     def scan_tools(self):
         """Scan tools directory for changes and update tools in database"""
-        print(f"Scanning tools directory: {self.tools_dir}")
-        changes = self.merkle_tree.update()
-        print(f"Found changes: {changes}")
-        
+        logger.info("Scanning tools directory: %s", self.tools_dir)
+        with self._scan_lock:
+            changes = self.merkle_tree.update()
+            logger.debug("Found changes: %s", changes)
+            self._apply_changes(changes)
+
+    def scan_tool_file(self, file_path: str):
+        """Update the tools of a single changed file in database
+
+        Only the file's path in the Merkle tree is rehashed, so a file save
+        does not rescan the whole tools directory.
+
+        Args:
+            file_path: Path of the added, modified or removed tool file
+        """
+        with self._scan_lock:
+            changes = self.merkle_tree.update_path(file_path)
+            logger.debug("Found changes in %s: %s", file_path, changes)
+            if any(changes.values()):
+                self._apply_changes(changes)
+
+    def _apply_changes(self, changes: dict):
+        """Write the tool changes of a Merkle tree update to database
+
+        Args:
+            changes: File changes returned by the Merkle tree update
+        """
         # 获取发生变化的函数信息
         changed_functions = getattr(self.merkle_tree, 'changed_functions', {})
-        print(f"Changed functions: {changed_functions}")
+        logger.debug("Changed functions: %s", changed_functions)
+
+        # Collect all tool changes first so the database is updated in batches
+        tool_rows = []
+        removed_tools = set()
+
         # Process changed files
         for file_path in changes['added'] | changes['modified']:
-            print(f"Processing file: {file_path}")
+            logger.debug("Processing file: %s", file_path)
             
             # 获取要删除的函数
             if file_path in changed_functions:
@@ -286,20 +552,35 @@ class ToolManager:
                 # 找出被删除的函数
                 deleted_funcs = old_funcs - new_funcs
                 if deleted_funcs:
-                    print(f"Functions to delete: {deleted_funcs}")
-                    for func_name in deleted_funcs:
-                        self._remove_tool(func_name)
+                    logger.debug("Functions to delete: %s", deleted_funcs)
+                    removed_tools.update(deleted_funcs)
             
             # 处理新增或修改的函数
-            self._process_tool_file(file_path, changed_functions.get(file_path, set()))
-            
+            tool_rows.extend(self._collect_tool_rows(file_path, changed_functions.get(file_path, set())))
+
         # Remove deleted files
         for file_path in changes['removed']:
-            print(f"Removing file: {file_path}")
-            self._remove_tool_file(file_path)
+            logger.info("Removing file: %s", file_path)
+            removed_tools.update(self._removed_file_tools(file_path))
+
+        # A tool that moved to another file is updated rather than removed
+        removed_tools.difference_update(row['name'] for row in tool_rows)
+
+        with self.neo4j_manager.session_scope():
+            removed = self._remove_tools(removed_tools)
+            upserted = self._upsert_tools(tool_rows)
+            if not (removed and upserted):
+                # 回退内存中的树且不保存状态，下次扫描会重新检测到这些变化并重试
+                logger.warning("Tool changes were not fully written, they will be retried on the next scan")
+                self.merkle_tree.root = self.merkle_tree.previous_root
+                return
             
-        # Save updated Merkle tree state
-        self._save_merkle_state()
+            # Save updated Merkle tree state
+            try:
+                self._save_merkle_state()
+            except Exception as e:
+                # 未保存的叶子在下次保存时仍会被视为变化而重新写入
+                logger.warning("Error saving Merkle tree state: %s", e)
 
     def _remove_tool(self, tool_name: str):
         """Remove a specific tool from database
@@ -307,114 +588,152 @@ class ToolManager:
         Args:
             tool_name: Name of the tool to remove
         """
-        print(f"Removing tool: {tool_name}")
-        with self.neo4j_manager.get_session() as session:
-            session.run("""
-                MATCH (tool:Tool {name: $name})
-                DELETE tool
-                """,
-                name=tool_name
+        logger.info("Removing tool: %s", tool_name)
+        self.neo4j_manager.run_write(
+            _CYPHER_REMOVE_TOOL,
+            name=tool_name
+        )
+
+    def _remove_tools(self, tool_names: set) -> bool:
+        """Remove several tools from database in one write
+
+        Args:
+            tool_names: Names of the tools to remove
+
+        Returns:
+            True if the tools were removed, False if the write failed
+        """
+        if not tool_names:
+            return True
+        logger.info("Removing tools: %s", ", ".join(sorted(tool_names)))
+        try:
+            self.neo4j_manager.run_write(
+                _CYPHER_REMOVE_TOOLS,
+                names=list(tool_names)
             )
+        except Exception as e:
+            logger.warning("Error removing tools: %s", e)
+            return False
+        return True
+
+    def _upsert_tools(self, tool_rows: list) -> bool:
+        """Create or update scanned tools in one write
+
+        If the batch fails, the tools are written one by one so that a single
+        bad row does not drop the whole batch.
 
-    def _process_tool_file(self, file_path: str, changed_functions: set = None):
-        """Process a tool file and update database
+        Args:
+            tool_rows: List of dicts with name, description and category
+
+        Returns:
+            True if every tool was written, False otherwise
+        """
+        if not tool_rows:
+            return True
+        for row in tool_rows:
+            logger.info("Upserting tool: %s in category %s", row['name'], row['category'])
+
+        try:
+            self._embed_tool_rows(tool_rows)
+            self.neo4j_manager.run_write(
+                _CYPHER_UPSERT_TOOLS,
+                rows=tool_rows
+            )
+            return True
+        except Exception as e:
+            logger.warning("Error upserting %s tools in one batch, retrying one by one: %s", len(tool_rows), e)
+
+        success = True
+        for row in tool_rows:
+            try:
+                self._embed_tool_rows([row])
+                self.neo4j_manager.run_write(
+                    _CYPHER_UPSERT_TOOLS,
+                    rows=[row]
+                )
+            except Exception as e:
+                logger.warning("Error upserting tool %s: %s", row['name'], e)
+                success = False
+        return success
+
+    def _embed_tool_rows(self, tool_rows: list):
+        """Set the embedding of each tool row that needs a new vector
+
+        A function whose body changed usually keeps its docstring; only new
+        tools and changed descriptions are embedded. Other rows get None and
+        keep their stored vector. Rows embedded by an earlier attempt are kept.
+
+        Args:
+            tool_rows: List of dicts with name, description and category
+        """
+        records = self.neo4j_manager.run_read(
+            _CYPHER_GET_TOOL_DESCRIPTIONS,
+            names=[row['name'] for row in tool_rows]
+        )
+        stored = {record['name']: record['description'] for record in records}
+        to_embed = [row for row in tool_rows
+                    if row.get('embedding') is None
+                    and (row['name'] not in stored or stored[row['name']] != row['description'])]
+
+        # Embed the remaining descriptions with a single batched request
+        embeddings = self.retriever_manager.embed_documents(
+            [f"{row['name']} {row['description']}" for row in to_embed]
+        )
+        for row, embedding in zip(to_embed, embeddings):
+            row['embedding'] = embedding
+        for row in tool_rows:
+            row.setdefault('embedding', None)
+
+    def _collect_tool_rows(self, file_path: str, changed_functions: set = None) -> list:
+        """Collect the tool rows of a tool file's changed functions
+
+        The Merkle tree update has already parsed the file, so names and
+        docstrings are taken from its function nodes instead of parsing again.
         
         Args:
             file_path: Path to the tool file
             changed_functions: Set of function names that have changed
+
+        Returns:
+            List of dicts with name, description and category
         """
         # Get file's relative path for category
         rel_path = os.path.relpath(file_path, self.tools_dir)
         category = os.path.splitext(rel_path)[0].replace(os.sep, '.')
 
-        # Parse file and extract tool info
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tree = ast.parse(content)
-                tools_info = self._extract_tool_info(file_path, tree)
-        except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-            return
-
         # Get current functions from Merkle tree
         current_node = self.merkle_tree.root
         for part in rel_path.split(os.sep):
             current_node = current_node.children.get(part)
             if not current_node:
-                print(f"File not found in Merkle tree: {file_path}")
-                return
+                logger.warning("File not found in Merkle tree: %s", file_path)
+                return []
 
-        print(f"\nProcessing file: {file_path}")
-        print(f"Found {len(tools_info)} functions")
+        logger.debug("Processing file: %s", file_path)
+        logger.debug("Found %s functions", len(current_node.children))
         
-        # Process each function
-        for func_name, info in tools_info.items():
-            print(f"Processing function: {func_name}")
+        tool_rows = []
+        for func_name, func_node in current_node.children.items():
             # Skip if we're only processing changed functions
             if changed_functions is not None and func_name not in changed_functions:
-                print(f"Function not changed: {func_name}")
+                logger.debug("Function not changed: %s", func_name)
                 continue
-            
-            tool_name = info['name']
-            description = info['docstring']
-            
-            # Check if tool exists
-            with self.neo4j_manager.get_session() as session:
-                exists = session.run("""
-                    MATCH (tool:Tool {name: $name})
-                    RETURN count(tool) > 0 as exists
-                    """,
-                    name=tool_name
-                ).single()["exists"]
-            
-            try:
-                if exists:
-                    print(f"Updating tool: {tool_name}")
-                    self.update_tool(
-                        name=tool_name,
-                        description=description,
-                        category=category
-                    )
-                else:
-                    print(f"Creating new tool: {tool_name} in category {category}")
-                    self.create_tool(
-                        name=tool_name,
-                        description=description,
-                        category=category
-                    )
-            except Exception as e:
-                print(f"Error processing tool {tool_name}: {e}")
-
-    def _extract_tool_info(self, file_path: str, tree: ast.AST) -> dict:
-        """Extract tool information from AST
-        
-        Args:
-            file_path: Path to the tool file
-            tree: AST of the file
-        
-        Returns:
-            Dict mapping function names to their info (name, docstring)
-        """
-        tools_info = {}
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                # Get docstring if it exists
-                docstring = ast.get_docstring(node) or ""
-                
-                tools_info[node.name] = {
-                    'name': node.name,
-                    'docstring': docstring
-                }
-                
-        return tools_info
+            logger.debug("Processing function: %s", func_name)
+            tool_rows.append({
+                'name': func_name,
+                'description': func_node.function_doc or "",
+                'category': category
+            })
+        return tool_rows
 
-    def _remove_tool_file(self, file_path: str):
-        """Remove tools from database when their file is deleted
+    def _removed_file_tools(self, file_path: str) -> list:
+        """Get the tools that belonged to a deleted tool file
         
         Args:
             file_path: Path to the deleted tool file
+
+        Returns:
+            List of tool names
         """
         # 从previous_root中查找被删除的文件节点
         rel_path = os.path.relpath(file_path, self.tools_dir)
@@ -422,41 +741,35 @@ class ToolManager:
         for part in rel_path.split(os.sep):
             current_node = current_node.children.get(part) if current_node else None
             if not current_node:
-                return
+                return []
         
-        # 删除文件中的所有函数对应的工具
-        for func_name, func_node in current_node.children.items():
-            if not func_node.is_function:
-                continue
-                
-            tool_name = func_node.function_name
-            with self.neo4j_manager.get_session() as session:
-                session.run("""
-                    MATCH (tool:Tool {name: $name})
-                    DELETE tool
-                    """,
-                    name=tool_name
-                )
-                print(f"Removed tool: {tool_name}")
+        # 文件中的所有函数对应的工具
+        return [func_node.function_name for func_node in current_node.children.values()
+                if func_node.is_function]
 
     def _save_merkle_state(self):
-        # Save updated Merkle tree state in database
-        with self.neo4j_manager.get_session() as session:
-            # Convert state to JSON string before saving
-            state_json = json.dumps(self.merkle_tree.get_state())
-            session.run("""
-                MERGE (merkle:FileMerkleTree)
-                SET merkle.state = $state
-                """,
-                state=state_json)
-
-    def _filter_tool_info(self, tool_info):
-        """Filter out embedding from tool info for display purposes"""
-        if not tool_info:
-            return None
-        if isinstance(tool_info, list):
-            return [{k: v for k, v in tool.items() if k != 'embedding'} for tool in tool_info]
-        return {k: v for k, v in tool_info.items() if k != 'embedding'}
+        """Save the file leaves of the Merkle tree that changed since the last save
+
+        Each file is stored as a (:FileLeaf {path}) node, so the write is
+        proportional to the number of changed files rather than the tree size.
+        """
+        files = self.merkle_tree.get_file_nodes()
+        saved = self._saved_leaves
+        # 未变化的文件沿用同一个节点对象，按对象是否相同找出变化的叶子
+        leaves = [MerkleTree.leaf_record(node) for path, node in files.items()
+                  if saved is None or saved.get(path) is not node]
+        removed = [path for path in saved if path not in files] if saved is not None else []
+        if saved is not None and not leaves and not removed:
+            return
+
+        # The first save also drops the JSON state written by older versions
+        self.neo4j_manager.run_write(
+            _CYPHER_SAVE_MERKLE_LEAVES,
+            hash_algorithm=STATE_VERSION,
+            removed=removed,
+            leaves=leaves
+        )
+        self._saved_leaves = files
 
     def list_tools(self) -> list:
         """List all tools in the database
@@ -464,13 +777,9 @@ class ToolManager:
         Returns:
             List of tool dictionaries
         """
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (tool:Tool)
-                RETURN tool
-            """)
-            tools = [record["tool"] for record in result]
-            return self._filter_tool_info(tools)
+        # Project the display fields on the server instead of shipping embeddings
+        records = self.neo4j_manager.run_read(_CYPHER_LIST_TOOLS)
+        return [record["tool"] for record in records]
 
     def search_tools(self, query: str, limit: int = 10) -> list:
         """Search for tools using hybrid search (vector + text)
@@ -478,36 +787,24 @@ class ToolManager:
         Args:
             query: Search query
             limit: Maximum number of results to return
-            
+
         Returns:
             List of matching tools
         """
-        # Get query embedding
-        embedding = self.retriever_manager.embedder.embed_query(query)
-        
-        # Perform hybrid search
-        with self.neo4j_manager.get_session() as session:
-            results = session.run("""
-                MATCH (tool:Tool)
-                WITH tool, 
-                     gds.similarity.cosine(tool.embedding, $embedding) as vector_score,
-                     CASE 
-                         WHEN tool.description CONTAINS $query_text THEN 1.0
-                         WHEN tool.name CONTAINS $query_text THEN 0.8
-                         ELSE 0.0 
-                     END as text_score
-                WITH tool, 
-                     (vector_score + text_score) / 2 as hybrid_score
-                ORDER BY hybrid_score DESC
-                LIMIT $limit
-                RETURN tool
-                """,
-                embedding=embedding,
-                query_text=query,
-                limit=limit
-            )
-            
-            return [record["tool"] for record in results]
+        # Get query embedding; repeated queries reuse the cached vector
+        embedding = self.retriever_manager.embed_query(query)
+        
+        # Perform hybrid search: the vector index returns the nearest
+        # candidates, which are then re-ranked with the text match score
+        records = self.neo4j_manager.run_read(
+            _CYPHER_SEARCH_TOOLS,
+            embedding=embedding,
+            candidates=limit * SEARCH_CANDIDATE_FACTOR,
+            query_text=query,
+            limit=limit
+        )
+
+        return [record["tool"] for record in records]
 
     def sync_tools(self):
         """同步工具目录和数据库
@@ -523,94 +820,94 @@ class ToolManager:
                     'removed': [{'name': str, 'category': str}]
                 }
         """
-        print(f"Synchronizing tools from {self.tools_dir}")
-        
-        # 跟踪同步操作
-        sync_result = {
-            'added': [],
-            'updated': [],
-            'removed': []
-        }
-        
-        # 1. 获取文件系统中的所有工具
-        fs_tools = {}  # {category: {name: (description, node)}}
-        
-        def scan_tools_dir(node: MerkleNode):
-            if node.is_function:
-                # 获取category（从文件路径）
-                file_path = node.path.split('::')[0]
-                rel_path = os.path.relpath(file_path, self.tools_dir)
-                category = os.path.splitext(rel_path)[0].replace(os.sep, '.')
+        # 与文件监听线程的增量更新互斥，避免同时修改Merkle树
+        with self._scan_lock:
+            logger.info("Synchronizing tools from %s", self.tools_dir)
+        
+            # 跟踪同步操作
+            sync_result = {
+                'added': [],
+                'updated': [],
+                'removed': []
+            }
+        
+            # 1. 获取文件系统中的所有工具
+            fs_tools = {}  # {category: {name: (description, node)}}
+        
+            def scan_tools_dir(node: MerkleNode):
+                if node.is_function:
+                    # 获取category（从文件路径）
+                    file_path = node.path.split('::')[0]
+                    rel_path = os.path.relpath(file_path, self.tools_dir)
+                    category = os.path.splitext(rel_path)[0].replace(os.sep, '.')
                 
-                # 存储工具信息
-                if category not in fs_tools:
-                    fs_tools[category] = {}
-                fs_tools[category][node.function_name] = (node.function_doc or "", node)
-            else:
-                # 递归处理子节点
-                for child in node.children.values():
-                    scan_tools_dir(child)
-        
-        # 构建新的Merkle树并扫描工具
-        self.merkle_tree.root = self.merkle_tree._build_tree(self.tools_dir)
-        scan_tools_dir(self.merkle_tree.root)
-        
-        # 2. 获取数据库中的所有工具
-        with self.neo4j_manager.get_session() as session:
-            result = session.run("""
-                MATCH (tool:Tool)
-                RETURN tool.name as name, tool.description as description, 
-                       tool.category as category
-            """)
-            db_tools = {}  # {category: {name: description}}
-            for record in result:
-                category = record['category']
-                if category not in db_tools:
-                    db_tools[category] = {}
-                db_tools[category][record['name']] = record['description']
-        
-        # 3. 对比并同步
-        # 3.1 处理每个category
-        all_categories = set(fs_tools.keys()) | set(db_tools.keys())
-        for category in all_categories:
-            fs_category_tools = fs_tools.get(category, {})
-            db_category_tools = db_tools.get(category, {})
-            
-            # 3.2 找出需要添加、更新和删除的工具
-            all_tools = set(fs_category_tools.keys()) | set(db_category_tools.keys())
-            for tool_name in all_tools:
-                if tool_name in fs_category_tools:
-                    description, node = fs_category_tools[tool_name]
-                    if tool_name not in db_category_tools:
-                        # 添加新工具
-                        print(f"Adding tool: {tool_name} in {category}")
-                        self.create_tool(tool_name, description, category)
-                        sync_result['added'].append({
-                            'name': tool_name,
-                            'category': category
-                        })
-                    elif db_category_tools[tool_name] != description:
-                        # 更新已有工具
-                        print(f"Updating tool: {tool_name} in {category}")
-                        self.update_tool(tool_name, description, category)
-                        sync_result['updated'].append({
-                            'name': tool_name,
-                            'category': category
-                        })
+                    # 存储工具信息
+                    if category not in fs_tools:
+                        fs_tools[category] = {}
+                    fs_tools[category][node.function_name] = (node.function_doc or "", node)
                 else:
-                    # 删除不存在的工具
-                    print(f"Removing tool: {tool_name} from {category}")
-                    self._remove_tool(tool_name)
-                    sync_result['removed'].append({
-                        'name': tool_name,
-                        'category': category
-                    })
-        
-        print("Tool synchronization completed")
-        return sync_result
+                    # 递归处理子节点
+                    for child in node.children.values():
+                        scan_tools_dir(child)
+        
+            # 构建新的Merkle树并扫描工具
+            self.merkle_tree.root = self.merkle_tree._build_tree(self.tools_dir)
+            scan_tools_dir(self.merkle_tree.root)
+        
+            # 数据库操作复用同一个会话，避免每个查询单独获取连接
+            with self.neo4j_manager.session_scope():
+                # 2. 获取数据库中的所有工具
+                records = self.neo4j_manager.run_read(_CYPHER_LIST_TOOL_DESCRIPTIONS)
+                db_tools = {}  # {category: {name: description}}
+                for record in records:
+                    category = record['category']
+                    if category not in db_tools:
+                        db_tools[category] = {}
+                    db_tools[category][record['name']] = record['description']
+        
+                # 3. 对比并同步
+                # 3.1 处理每个category
+                all_categories = set(fs_tools.keys()) | set(db_tools.keys())
+                for category in all_categories:
+                    fs_category_tools = fs_tools.get(category, {})
+                    db_category_tools = db_tools.get(category, {})
+            
+                    # 3.2 找出需要添加、更新和删除的工具
+                    all_tools = set(fs_category_tools.keys()) | set(db_category_tools.keys())
+                    for tool_name in all_tools:
+                        if tool_name in fs_category_tools:
+                            description, node = fs_category_tools[tool_name]
+                            if tool_name not in db_category_tools:
+                                # 添加新工具
+                                logger.info("Adding tool: %s in %s", tool_name, category)
+                                self.create_tool(tool_name, description, category)
+                                sync_result['added'].append({
+                                    'name': tool_name,
+                                    'category': category
+                                })
+                            elif db_category_tools[tool_name] != description:
+                                # 更新已有工具
+                                logger.info("Updating tool: %s in %s", tool_name, category)
+                                self.update_tool(tool_name, description, category)
+                                sync_result['updated'].append({
+                                    'name': tool_name,
+                                    'category': category
+                                })
+                        else:
+                            # 删除不存在的工具
+                            logger.info("Removing tool: %s from %s", tool_name, category)
+                            self._remove_tool(tool_name)
+                            sync_result['removed'].append({
+                                'name': tool_name,
+                                'category': category
+                            })
+        
+            logger.info("Tool synchronization completed")
+            return sync_result
 
     def cleanup(self):
         """Clean up resources"""
         if self.observer:
             self.observer.stop()
             self.observer.join()
+            self._file_handler.cancel()
@@ -15,45 +15,89 @@ class WorkflowManager:
             description: Workflow description
             tasks: List of tasks, each containing name and order
         """
-        with self.neo4j_manager.get_session() as session:
-            # Check if workflow exists
-            existing_workflow = session.run("""
+        # Check if workflow exists and which tasks are missing in one round trip
+        record = self.neo4j_manager.run_read("""
+            OPTIONAL MATCH (w:Workflow {name: $name})
+            RETURN w,
+                   [task_name IN $task_names
+                    WHERE NOT EXISTS { MATCH (:Task {name: task_name}) }] as missing_tasks
+            """,
+            name=name,
+            task_names=[task["name"] for task in tasks]
+        )[0]
+
+        if record["w"] is not None:
+            return record["w"]
+
+        missing_tasks = record["missing_tasks"]
+        if missing_tasks:
+            raise ValueError(f"Cannot create workflow '{name}'. The following tasks do not exist: {', '.join(missing_tasks)}")
+
+        # Create embedding vector
+        embedding = self.retriever_manager.embed_query(f"{name} {description}")
+
+        # Create new workflow and add tasks
+        records = self.neo4j_manager.run_write("""
+            CREATE (w:Workflow {
+                name: $name,
+                description: $description,
+                embedding: $embedding
+            })
+
+            WITH w
+            UNWIND $tasks as task
+            MATCH (t:Task {name: task.name})
+            CREATE (w)-[r:CONTAINS {order: task.order}]->(t)
+
+            RETURN w
+            LIMIT 1
+            """,
+            name=name,
+            description=description,
+            tasks=tasks,
+            embedding=embedding
+        )
+
+        return records[0]["w"] if records else None
+
+    def update_workflow(self, name: str, description: str = None, tasks: List[Dict[str, Union[str, int]]] = None) -> Dict:
+        """Update existing workflow properties and tasks
+
+        Args:
+            name: Workflow name
+            description: Workflow description
+            tasks: List of tasks, each containing name and order
+        """
+        # Check the workflow and any missing tasks in one round trip
+        records = self.neo4j_manager.run_read("""
+            MATCH (w:Workflow {name: $name})
+            RETURN [task_name IN $task_names
+                    WHERE NOT EXISTS { MATCH (:Task {name: task_name}) }] as missing_tasks
+            """,
+            name=name,
+            task_names=[task["name"] for task in tasks or []]
+        )
+
+        if not records:
+            raise ValueError(f"Workflow '{name}' does not exist. Use create_workflow to create new workflows.")
+
+        missing_tasks = records[0]["missing_tasks"]
+        if missing_tasks:
+            raise ValueError(f"Cannot update workflow '{name}'. The following tasks do not exist: {', '.join(missing_tasks)}")
+
+        # Create new embedding vector
+        embedding = self.retriever_manager.embed_query(f"{name} {description if description else ''}")
+
+        # Update workflow properties and tasks
+        if tasks:
+            records = self.neo4j_manager.run_write("""
                 MATCH (w:Workflow {name: $name})
-                RETURN w
-                LIMIT 1
-                """,
-                name=name
-            ).single()
-            
-            if existing_workflow:
-                return existing_workflow["w"]
-            
-            # Check if all tasks exist
-            missing_tasks = []
-            for task in tasks:
-                task_exists = session.run("""
-                    MATCH (t:Task {name: $task_name})
-                    RETURN count(t) > 0 as exists
-                    """,
-                    task_name=task["name"]
-                ).single()["exists"]
+                SET w.embedding = $embedding
+                SET w.description = CASE WHEN $description IS NULL THEN w.description ELSE $description END
                 
-                if not task_exists:
-                    missing_tasks.append(task["name"])
-            
-            if missing_tasks:
-                raise ValueError(f"Cannot create workflow '{name}'. The following tasks do not exist: {', '.join(missing_tasks)}")
-            
-            # Create embedding vector
-            embedding = self.retriever_manager.embedder.embed_query(f"{name} {description}")
-            
-            # Create new workflow and add tasks
-            result = session.run("""
-                CREATE (w:Workflow {
-                    name: $name,
-                    description: $description,
-                    embedding: $embedding
-                })
+                WITH w
+                OPTIONAL MATCH (w)-[r:CONTAINS]->(:Task)
+                DELETE r
                 
                 WITH w
                 UNWIND $tasks as task
@@ -68,89 +112,20 @@ class WorkflowManager:
                 tasks=tasks,
                 embedding=embedding
             )
-            
-            record = result.single()
-            return record["w"] if record else None
-
-    def update_workflow(self, name: str, description: str = None, tasks: List[Dict[str, Union[str, int]]] = None) -> Dict:
-        """Update existing workflow properties and tasks
-        
-        Args:
-            name: Workflow name
-            description: Workflow description
-            tasks: List of tasks, each containing name and order
-        """
-        with self.neo4j_manager.get_session() as session:
-            # Check if workflow exists
-            exists = session.run("""
+        else:
+            records = self.neo4j_manager.run_write("""
                 MATCH (w:Workflow {name: $name})
-                RETURN count(w) > 0 as exists
+                SET w.embedding = $embedding
+                SET w.description = CASE WHEN $description IS NULL THEN w.description ELSE $description END
+                RETURN w
+                LIMIT 1
                 """,
-                name=name
-            ).single()["exists"]
-            
-            if not exists:
-                raise ValueError(f"Workflow '{name}' does not exist. Use create_workflow to create new workflows.")
-            
-            # If tasks specified, check if they all exist
-            if tasks:
-                missing_tasks = []
-                for task in tasks:
-                    task_exists = session.run("""
-                        MATCH (t:Task {name: $task_name})
-                        RETURN count(t) > 0 as exists
-                        """,
-                        task_name=task["name"]
-                    ).single()["exists"]
-                    
-                    if not task_exists:
-                        missing_tasks.append(task["name"])
-                
-                if missing_tasks:
-                    raise ValueError(f"Cannot update workflow '{name}'. The following tasks do not exist: {', '.join(missing_tasks)}")
-            
-            # Create new embedding vector
-            embedding = self.retriever_manager.embedder.embed_query(f"{name} {description if description else ''}")
-            
-            # Update workflow properties and tasks
-            if tasks:
-                result = session.run("""
-                    MATCH (w:Workflow {name: $name})
-                    SET w.embedding = $embedding
-                    SET w.description = CASE WHEN $description IS NULL THEN w.description ELSE $description END
-                    
-                    WITH w
-                    OPTIONAL MATCH (w)-[r:CONTAINS]->(:Task)
-                    DELETE r
-                    
-                    WITH w
-                    UNWIND $tasks as task
-                    MATCH (t:Task {name: task.name})
-                    CREATE (w)-[r:CONTAINS {order: task.order}]->(t)
-                    
-                    RETURN w
-                    LIMIT 1
-                    """,
-                    name=name,
-                    description=description,
-                    tasks=tasks,
-                    embedding=embedding
-                )
-            else:
-                result = session.run("""
-                    MATCH (w:Workflow {name: $name})
-                    SET w.embedding = $embedding
-                    SET w.description = CASE WHEN $description IS NULL THEN w.description ELSE $description END
-                    RETURN w
-                    LIMIT 1
-                    """,
-                    name=name,
-                    description=description,
-                    embedding=embedding
-                )
-            
-            record = result.single()
-            return record["w"] if record else None
+                name=name,
+                description=description,
+                embedding=embedding
+            )
+
+        return records[0]["w"] if records else None
 
     def execute_tool(self, task: Dict, tool: Dict, context_variables: Dict[str, Any]):
         """Execute task using dynamic import"""
@@ -165,7 +140,7 @@ class WorkflowManager:
             # Execute tool function with context variables
             result = tool_function(**context_variables)
             return result
-            
+
         except ImportError:
             raise ImportError(f"Tool module '{module_path}' not found")
         except AttributeError:
@@ -179,35 +154,35 @@ class WorkflowManager:
         Args:
             workflow_name: Workflow name
             context_variables: Context variables
-            
+
         Returns:
             Dict[str, Any]: Execution results and context variables
         """
         if context_variables is None:
             context_variables = {}
-            
-        with self.neo4j_manager.get_session() as session:
-            # Get workflow tasks in order
-            result = session.run("""
-                MATCH (w:Workflow {name: $workflow_name})-[r:CONTAINS]->(task:Task)
-                RETURN task, r.order as task_order
-                ORDER BY r.order
-                """,
-                workflow_name=workflow_name
-            )
-            
-            tasks = []
-            for record in result:
-                tasks.append({
-                    "task": record["task"],
-                    "order": record["task_order"]
-                })
-            
-            if not tasks:
-                raise ValueError(f"Workflow '{workflow_name}' not found or has no tasks")
-            
-            # Execute tasks in order
-            results = {}
+
+        # Get workflow tasks in order
+        records = self.neo4j_manager.run_read("""
+            MATCH (w:Workflow {name: $workflow_name})-[r:CONTAINS]->(task:Task)
+            RETURN task {.name} AS task, r.order as task_order
+            ORDER BY r.order
+            """,
+            workflow_name=workflow_name
+        )
+
+        tasks = []
+        for record in records:
+            tasks.append({
+                "task": record["task"],
+                "order": record["task_order"]
+            })
+
+        if not tasks:
+            raise ValueError(f"Workflow '{workflow_name}' not found or has no tasks")
+
+        # Execute tasks in order, with every task lookup sharing one session
+        results = {}
+        with self.neo4j_manager.session_scope():
             for task_info in tasks:
                 task = task_info["task"]
                 
@@ -216,11 +191,11 @@ class WorkflowManager:
                     result = self.task_manager.execute_task(task["name"], context_variables)
                     results[task["name"]] = result["results"]
                     context_variables = result["context_variables"]
-                        
+
                 except Exception as e:
                     raise Exception(f"Error executing task '{task['name']}': {str(e)}")
-            
-            return {
-                "results": results,
-                "context_variables": context_variables
-            }
+
+        return {
+            "results": results,
+            "context_variables": context_variables
+        }
@@ -1,7 +1,29 @@
+import hashlib
+import threading
 from typing import Dict, List
 from neo4j_graphrag.retrievers import HybridCypherRetriever
 from neo4j_graphrag.embeddings.openai import OpenAIEmbeddings
 
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Number of recently embedded texts whose vectors are kept in memory
+EMBEDDING_CACHE_SIZE = 4096
+
+# Maximum number of texts sent in one embeddings request
+EMBEDDING_BATCH_SIZE = 512
+
+
+def _as_float_list(vector) -> List[float]:
+    """Return an embedding as a flat list of Python floats
+
+    Array-like vectors (e.g. numpy) are converted once here so the driver
+    packs plain floats instead of converting element by element per query.
+    """
+    tolist = getattr(vector, 'tolist', None)
+    return tolist() if tolist is not None else vector
 
 class RetrieverManager:
     def __init__(self, neo4j_manager, embedder_config):
@@ -9,7 +31,8 @@ class RetrieverManager:
         
         Args:
             neo4j_manager: Neo4j database manager
-            embedder_config: Embedder configuration dictionary containing api_key, base_url, and model
+            embedder_config: Embedder configuration dictionary containing api_key, base_url, and model;
+                an optional cache_dir persists embeddings across processes (requires diskcache)
         """
         self.neo4j_manager = neo4j_manager
         self.embedder = OpenAIEmbeddings(
@@ -17,11 +40,92 @@ class RetrieverManager:
             api_key=embedder_config['api_key'],
             model=embedder_config['model']
         )
+        self._model = embedder_config['model']
+        cache_dir = embedder_config.get('cache_dir')
+        if cache_dir and diskcache is None:
+            raise ImportError("EMBEDDER_CACHE_DIR is set but the diskcache package is not installed")
+        self._disk_cache = diskcache.Cache(cache_dir) if cache_dir else None
+        # Text -> vector for the most recently used texts, oldest first
+        self._memory_cache = {}
+        self._memory_cache_lock = threading.Lock()
         
         self.workflow_retriever = self._create_workflow_retriever()
         self.task_retriever = self._create_task_retriever()
         self.tool_retriever = self._create_tool_retriever()
 
+    def embed_query(self, text: str) -> List[float]:
+        """Embed text, reusing the vector for recently embedded texts
+
+        The returned list is shared with the cache and must not be modified.
+        """
+        embedding = self._cached_embedding(text)
+        if embedding is None:
+            embedding = _as_float_list(self.embedder.embed_query(text))
+            self._store_embedding(text, embedding)
+        return embedding
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts with as few embeddings requests as possible
+
+        Texts found in the cache are not sent again, and the new vectors are
+        cached for later embed_query and embed_documents calls. The remaining
+        texts are sent in batches of EMBEDDING_BATCH_SIZE to stay within
+        provider request limits.
+
+        Returns:
+            List of vectors in the same order as texts
+        """
+        embeddings = [self._cached_embedding(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        computed = {}
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+            for text, embedding in zip(batch, self._embed_batch(batch)):
+                self._store_embedding(text, embedding)
+                computed[text] = embedding
+        return [embedding if embedding is not None else computed[text]
+                for text, embedding in zip(texts, embeddings)]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with a single embeddings request"""
+        embed_documents = getattr(self.embedder, 'embed_documents', None)
+        if embed_documents is not None:
+            return [_as_float_list(vector) for vector in embed_documents(texts)]
+        response = self.embedder.client.embeddings.create(input=texts, model=self.embedder.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _cached_embedding(self, text: str):
+        """Get a text's vector from the memory or disk cache, or None if it is not cached"""
+        with self._memory_cache_lock:
+            embedding = self._memory_cache.pop(text, None)
+            if embedding is not None:
+                # Move the text to the most recently used end
+                self._memory_cache[text] = embedding
+                return embedding
+        if self._disk_cache is None:
+            return None
+        embedding = self._disk_cache.get(self._disk_cache_key(text))
+        if embedding is not None:
+            self._remember_embedding(text, embedding)
+        return embedding
+
+    def _store_embedding(self, text: str, embedding: List[float]):
+        """Cache a new vector in memory and, when configured, on disk"""
+        self._remember_embedding(text, embedding)
+        if self._disk_cache is not None:
+            self._disk_cache.set(self._disk_cache_key(text), embedding)
+
+    def _remember_embedding(self, text: str, embedding: List[float]):
+        """Keep a vector in memory, evicting the least recently used beyond EMBEDDING_CACHE_SIZE"""
+        with self._memory_cache_lock:
+            self._memory_cache[text] = embedding
+            while len(self._memory_cache) > EMBEDDING_CACHE_SIZE:
+                del self._memory_cache[next(iter(self._memory_cache))]
+
+    def _disk_cache_key(self, text: str) -> str:
+        # Vectors depend on the model, so it is part of the key
+        return hashlib.blake2b(f"{self._model}\0{text}".encode(), digest_size=16).hexdigest()
+
     def _create_workflow_retriever(self):
         return HybridCypherRetriever(
             driver=self.neo4j_manager.driver,
@@ -130,7 +234,7 @@ class RetrieverManager:
                     "similarity_score": similarity,
                     "tasks": tasks
                 }
-                
+
             elif result_type == "task":
                 # Parse task search results
                 task_name = content.split("task_name='")[1].split("'")[0]
@@ -147,7 +251,7 @@ class RetrieverManager:
                     "tool": tool_name,
                     "workflows": workflows
                 }
-                
+
             elif result_type == "tool":
                 # Parse tool search results
                 tool_name = content.split("tool_name='")[1].split("'")[0]
@@ -0,0 +1,31 @@
+import pytest
+
+from aflow.config import load_config
+
+
+@pytest.fixture(autouse=True)
+def fresh_config():
+    load_config.cache_clear()
+    yield
+    load_config.cache_clear()
+
+
+def test_config_is_loaded_once(monkeypatch):
+    monkeypatch.setenv('TOOLS_DIR', 'first/tools')
+    config = load_config()
+
+    monkeypatch.setenv('TOOLS_DIR', 'second/tools')
+    assert load_config() is config
+    assert config['tools_dir'] == 'first/tools'
+
+    load_config.cache_clear()
+    assert load_config()['tools_dir'] == 'second/tools'
+
+
+def test_config_is_read_only():
+    config = load_config()
+
+    with pytest.raises(TypeError):
+        config['tools_dir'] = 'elsewhere'
+    with pytest.raises(TypeError):
+        config['neo4j']['uri'] = 'neo4j://elsewhere:7687'
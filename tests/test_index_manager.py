@@ -0,0 +1,122 @@
+import pytest
+
+from aflow.database.index_manager import IndexManager, build_index_queries
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, query, **params):
+        self.session.created.append(' '.join(query.split()))
+        return self
+
+    def consume(self):
+        pass
+
+
+class FakeSession:
+    """Reports the given indexes in SHOW INDEXES and records the DDL it is sent"""
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.created = []
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def run(self, query, **params):
+        assert query.startswith('SHOW INDEXES')
+        return [{'name': name, 'options': options} for name, options in self.indexes.items()]
+
+    def execute_write(self, work):
+        self.transactions += 1
+        return work(FakeTransaction(self))
+
+
+class FakeNeo4jManager:
+    def __init__(self, indexes):
+        self.session = FakeSession(indexes)
+
+    def get_session(self):
+        return self.session
+
+
+def init_indexes(indexes, embedder_config=None):
+    neo4j_manager = FakeNeo4jManager(indexes)
+    IndexManager(neo4j_manager, embedder_config).init_indexes()
+    return neo4j_manager.session.created
+
+
+def test_creates_uses_order_relationship_index():
+    created = init_indexes({})
+
+    assert 'CREATE INDEX usesOrder IF NOT EXISTS FOR ()-[r:USES]-() ON (r.order)' in created
+
+
+def vector_options(dimensions=1536, similarity='COSINE', **extra):
+    return {'indexProvider': 'vector-2.0',
+            'indexConfig': {'vector.dimensions': dimensions, 'vector.similarity_function': similarity, **extra}}
+
+
+@pytest.mark.parametrize('quantization, expected', [
+    (None, None),
+    (False, '`vector.quantization.enabled`: false'),
+    (True, '`vector.quantization.enabled`: true'),
+])
+def test_quantization_option(quantization, expected):
+    query = ' '.join(build_index_queries(quantization=quantization)['toolEmbedding'].split())
+
+    assert '`vector.dimensions`: 1536' in query
+    if expected is None:
+        assert 'quantization' not in query
+    else:
+        assert expected in query
+
+
+def test_warns_about_vector_index_options_that_differ(caplog):
+    indexes = {
+        'toolEmbedding': vector_options(768, 'EUCLIDEAN', **{'vector.quantization.enabled': True}),
+        'taskEmbedding': vector_options(),
+    }
+
+    init_indexes(indexes, {'quantization': False})
+
+    warnings = [record.getMessage() for record in caplog.records if record.levelname == 'WARNING']
+    assert len(warnings) == 1
+    assert 'toolEmbedding' in warnings[0]
+    for option in ('vector.dimensions', 'vector.similarity_function', 'vector.quantization.enabled'):
+        assert option in warnings[0]
+
+
+def test_matching_vector_indexes_are_not_reported(caplog):
+    indexes = {name: vector_options(1024) for name in ('toolEmbedding', 'taskEmbedding', 'workflowEmbedding')}
+
+    init_indexes(indexes, {'dimensions': 1024, 'quantization': True})
+
+    assert not [record for record in caplog.records if record.levelname == 'WARNING']
+
+
+def test_creates_only_missing_indexes_in_one_transaction():
+    manager = IndexManager(FakeNeo4jManager({}))
+    existing = {name: vector_options() if name.endswith('Embedding') else None
+                for name in manager.index_queries if name not in ('taskName', 'toolFulltext')}
+    neo4j_manager = FakeNeo4jManager(existing)
+
+    IndexManager(neo4j_manager).init_indexes()
+
+    created = neo4j_manager.session.created
+    assert neo4j_manager.session.transactions == 1
+    assert len(created) == 2
+    assert any(query.startswith('CREATE CONSTRAINT taskName IF NOT EXISTS') for query in created)
+    assert any(query.startswith('CREATE FULLTEXT INDEX toolFulltext IF NOT EXISTS') for query in created)
+
+
+def test_sends_nothing_when_every_index_exists():
+    names = IndexManager(FakeNeo4jManager({})).index_queries
+
+    assert init_indexes({name: vector_options() if name.endswith('Embedding') else None for name in names}) == []
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from aflow.models.merkle_tree import MerkleTree, STATE_VERSION
+
+
+def write(root, rel_path, content):
+    path = os.path.join(str(root), rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+@pytest.fixture
+def tool_dir(tmp_path):
+    write(tmp_path, 'core/calculator.py',
+          'def add(a, b):\n    """Add two numbers"""\n    return a + b\n\n'
+          'def sub(a, b):\n    return a - b\n')
+    write(tmp_path, 'core/text.py', 'def upper(text):\n    return text.upper()\n')
+    write(tmp_path, 'api/weather.py', 'def forecast(city):\n    return city\n')
+    return tmp_path
+
+
+def bump_mtime(path):
+    # 保证同一时间戳精度内的重写也能被mtime/size检查发现
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def stored(record):
+    """Mimic a FileLeaf read back with leaf {.*}: null properties are not stored"""
+    return {key: value for key, value in json.loads(json.dumps(record)).items() if value is not None}
+
+
+def test_leaf_records_round_trip(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    records = [stored(MerkleTree.leaf_record(node)) for node in tree.get_file_nodes().values()]
+
+    loaded = MerkleTree(str(tool_dir), build=False)
+    loaded.load_leaves(records, STATE_VERSION)
+
+    assert loaded.root.hash == tree.root.hash
+    calculator = os.path.join(str(tool_dir), 'core', 'calculator.py')
+    assert loaded.get_file_nodes()[calculator].children['add'].function_doc == 'Add two numbers'
+    assert loaded.get_file_nodes()[calculator].children['sub'].function_doc is None
+    assert not any(loaded.update().values())
+
+
+def test_load_leaves_without_stat_or_content_hash(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    text = os.path.join(str(tool_dir), 'core', 'text.py')
+    # 文件无法stat时保存的叶子没有mtime/size和内容哈希
+    node = tree.get_file_nodes()[text]
+    node.mtime_ns = node.size = node.content_hash = None
+    records = [stored(MerkleTree.leaf_record(node)) for node in tree.get_file_nodes().values()]
+    assert 'mtime_ns' not in {record['path']: record for record in records}[text]
+
+    loaded = MerkleTree(str(tool_dir), build=False)
+    loaded.load_leaves(records, STATE_VERSION)
+
+    loaded_node = loaded.get_file_nodes()[text]
+    assert (loaded_node.mtime_ns, loaded_node.size, loaded_node.content_hash) == (None, None, None)
+    assert not any(loaded.update().values())
+    assert loaded.get_file_nodes()[text].mtime_ns is not None
+
+
+def test_load_leaves_with_old_state_version_rehashes(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    records = [stored(MerkleTree.leaf_record(node)) for node in tree.get_file_nodes().values()]
+
+    loaded = MerkleTree(str(tool_dir), build=False)
+    loaded.load_leaves(records, 'sha256')
+
+    assert all(node.mtime_ns is None and node.content_hash is None
+               for node in loaded.get_file_nodes().values())
+    changes = loaded.update()
+    assert not changes['added'] and not changes['removed']
+    assert loaded.root.hash == tree.root.hash
+
+
+@pytest.mark.parametrize('action', ['modify', 'add', 'delete'])
+def test_update_path_matches_full_rebuild(tool_dir, action):
+    tree = MerkleTree(str(tool_dir))
+    if action == 'modify':
+        path = write(tool_dir, 'core/text.py', 'def upper(text):\n    return text.upper() + "!"\n')
+        bump_mtime(path)
+    elif action == 'add':
+        path = write(tool_dir, 'api/news/headlines.py', 'def headlines():\n    return []\n')
+    else:
+        path = os.path.join(str(tool_dir), 'api', 'weather.py')
+        os.remove(path)
+
+    changes = tree.update_path(path)
+
+    # 新增文件中的函数都是新函数，文件同时记为修改
+    expected = {'modify': {'modified'}, 'add': {'added', 'modified'}, 'delete': {'removed'}}[action]
+    assert changes == {key: {path} if key in expected else set() for key in changes}
+    assert tree.root.hash == MerkleTree(str(tool_dir)).root.hash
+    assert tree.get_changes() == changes
+
+
+def test_update_path_ignores_unchanged_and_untracked_files(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    root = tree.root
+
+    assert not any(tree.update_path(os.path.join(str(tool_dir), 'core', 'text.py')).values())
+    notes = write(tool_dir, 'core/notes.txt', 'not a tool')
+    assert not any(tree.update_path(notes).values())
+    assert tree.root is root
+
+
+def test_update_reuses_files_with_unchanged_mtime_and_size(tool_dir, monkeypatch):
+    tree = MerkleTree(str(tool_dir))
+    before = tree.get_file_nodes()
+    hashed = []
+    calculate_file_hash = tree._calculate_file_hash
+    monkeypatch.setattr(tree, '_calculate_file_hash', lambda path: hashed.append(path) or calculate_file_hash(path))
+
+    assert not any(tree.update().values())
+    assert hashed == []
+    after = tree.get_file_nodes()
+    assert all(after[path] is node for path, node in before.items())
+
+    path = write(tool_dir, 'core/text.py', 'def upper(text):\n    return text.upper() + "?"\n')
+    bump_mtime(path)
+    tree.update()
+    assert hashed == [path]
+    after = tree.get_file_nodes()
+    assert after[path] is not before[path]
+    assert all(after[other] is node for other, node in before.items() if other != path)
+
+
+def test_update_reports_added_modified_and_removed_files(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    modified = write(tool_dir, 'core/calculator.py', 'def add(a, b):\n    return b + a\n')
+    bump_mtime(modified)
+    added = write(tool_dir, 'api/stocks.py', 'def quote(symbol):\n    return symbol\n')
+    removed = os.path.join(str(tool_dir), 'core', 'text.py')
+    os.remove(removed)
+
+    changes = tree.update()
+
+    # 新增文件中的函数都是新函数，文件同时记为修改
+    assert changes == {'added': {added}, 'modified': {modified, added}, 'removed': {removed}}
+    assert tree.changed_functions == {modified: {'add', 'sub'}, added: {'quote'}}
+
+
+def test_get_changes_matches_update(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    assert tree.get_changes() == {'added': set(tree.get_file_nodes()), 'modified': set(), 'removed': set()}
+
+    modified = write(tool_dir, 'api/weather.py', 'def forecast(city, days=3):\n    return city\n')
+    bump_mtime(modified)
+    write(tool_dir, 'api/news/headlines.py', 'def headlines():\n    return []\n')
+    os.remove(os.path.join(str(tool_dir), 'core', 'text.py'))
+    changes = tree.update()
+
+    assert tree.get_changes() == changes
+
+
+def test_extracts_functions_inside_compound_statements(tmp_path):
+    path = write(tmp_path, 'core/compat.py',
+                 'try:\n'
+                 '    import json\n'
+                 '    def dump(value):\n'
+                 '        return json.dumps(value)\n'
+                 'except ImportError:\n'
+                 '    pass\n'
+                 'if True:\n'
+                 '    def load(text):\n'
+                 '        """Load JSON"""\n'
+                 '        def inner():\n'
+                 '            pass\n'
+                 '        return text\n')
+    tree = MerkleTree(str(tmp_path))
+
+    functions = tree.get_file_nodes()[path].children
+    assert set(functions) == {'dump', 'load'}
+    assert functions['load'].function_doc == 'Load JSON'
+
+
+def legacy_node(path):
+    """Describe a path in the nested dict format of the original get_state (sha256 hex hashes)"""
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        return {'hash': content_hash, 'path': path, 'children': {}, 'is_file': True,
+                'content_hash': content_hash, 'is_function': False,
+                'function_name': None, 'function_doc': None}
+    children = {name: legacy_node(os.path.join(path, name)) for name in sorted(os.listdir(path))}
+    dir_hash = hashlib.sha256(''.join(sorted(child['hash'] for child in children.values())).encode()).hexdigest()
+    return {'hash': dir_hash, 'path': path, 'children': children, 'is_file': False,
+            'content_hash': None, 'is_function': False,
+            'function_name': None, 'function_doc': None}
+
+
+def test_state_round_trip(tool_dir):
+    tree = MerkleTree(str(tool_dir))
+    write(tool_dir, 'api/stocks.py', 'def quote(symbol):\n    return symbol\n')
+    tree.update()
+    state = json.loads(json.dumps(tree.get_state()))
+    assert state['hash_algorithm'] == STATE_VERSION
+
+    loaded = MerkleTree(str(tool_dir), build=False)
+    loaded.load_state(state)
+
+    assert loaded.root.hash == tree.root.hash
+    assert loaded.previous_root.hash == tree.previous_root.hash
+    assert loaded.get_changes() == tree.get_changes()
+    for path, node in tree.get_file_nodes().items():
+        loaded_node = loaded.get_file_nodes()[path]
+        assert loaded_node.content_hash == node.content_hash
+        assert (loaded_node.mtime_ns, loaded_node.size) == (node.mtime_ns, node.size)
+        assert {name: (func.hash, func.function_doc) for name, func in loaded_node.children.items()} == \
+            {name: (func.hash, func.function_doc) for name, func in node.children.items()}
+    assert not any(loaded.update().values())
+
+
+def test_load_legacy_nested_state(tool_dir):
+    state = {'root_dir': str(tool_dir), 'root': legacy_node(str(tool_dir)), 'previous_root': None}
+
+    tree = MerkleTree(str(tool_dir), build=False)
+    tree.load_state(json.loads(json.dumps(state)))
+    assert set(tree.get_file_nodes()) == set(MerkleTree(str(tool_dir)).get_file_nodes())
+
+    # 旧状态使用其他哈希算法，更新时所有文件重新计算哈希，但不会被当作新增或删除
+    changes = tree.update()
+    assert not changes['added'] and not changes['removed']
+    assert tree.root.hash == MerkleTree(str(tool_dir)).root.hash
+    assert not any(tree.update().values())
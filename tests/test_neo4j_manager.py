@@ -0,0 +1,53 @@
+import pytest
+
+from aflow.database import neo4j_manager
+from aflow.database.neo4j_manager import Neo4jManager
+
+
+class FakeDriver:
+    def __init__(self, uri, auth, **settings):
+        self.uri = uri
+        self.auth = auth
+        self.settings = settings
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_driver(monkeypatch):
+    monkeypatch.setattr(neo4j_manager.GraphDatabase, 'driver', FakeDriver)
+    monkeypatch.setattr(neo4j_manager, '_DRIVER_CACHE', {})
+
+
+def test_managers_share_one_driver_across_databases():
+    first = Neo4jManager('neo4j://db:7687', 'neo4j', 'secret', database='neo4j')
+    second = Neo4jManager('neo4j://db:7687', 'neo4j', 'secret', database='tools')
+
+    assert first.driver is second.driver
+    assert (first.database, second.database) == ('neo4j', 'tools')
+
+
+def test_credentials_and_settings_get_their_own_driver():
+    manager = Neo4jManager('neo4j://db:7687', 'neo4j', 'secret')
+
+    assert Neo4jManager('neo4j://db:7687', 'neo4j', 'other').driver is not manager.driver
+    assert Neo4jManager('neo4j://db:7687', 'admin', 'secret').driver is not manager.driver
+    assert Neo4jManager('neo4j://db:7687', 'neo4j', 'secret',
+                        max_connection_pool_size=5).driver is not manager.driver
+
+
+def test_driver_is_closed_with_its_last_manager():
+    first = Neo4jManager('neo4j://db:7687', 'neo4j', 'secret')
+    second = Neo4jManager('neo4j://db:7687', 'neo4j', 'secret')
+    driver = first.driver
+
+    first.close()
+    first.close()
+    assert not driver.closed
+
+    second.close()
+    assert driver.closed
+    assert neo4j_manager._DRIVER_CACHE == {}
+    assert Neo4jManager('neo4j://db:7687', 'neo4j', 'secret').driver is not driver
@@ -0,0 +1,90 @@
+import pytest
+
+from aflow.retrieval import retriever_manager
+from aflow.retrieval.retriever_manager import RetrieverManager
+
+
+class FakeEmbeddings:
+    """Embeds a text as its length and records every request"""
+
+    def __init__(self, base_url, api_key, model):
+        self.requests = []
+
+    def embed_query(self, text):
+        self.requests.append([text])
+        return [float(len(text))]
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeNeo4jManager:
+    driver = None
+    database = 'neo4j'
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(retriever_manager, 'OpenAIEmbeddings', FakeEmbeddings)
+    monkeypatch.setattr(retriever_manager, 'HybridCypherRetriever', lambda **kwargs: None)
+    return RetrieverManager(FakeNeo4jManager(), {'base_url': None, 'api_key': None, 'model': 'test'})
+
+
+def test_embed_documents_shares_the_query_cache(manager):
+    query_vector = manager.embed_query('add numbers')
+
+    vectors = manager.embed_documents(['add numbers', 'ping', 'ping', 'search'])
+
+    assert vectors == [[11.0], [4.0], [4.0], [6.0]]
+    assert vectors[0] is query_vector
+    assert manager.embed_query('ping') is vectors[1]
+    assert manager.embedder.requests == [['add numbers'], ['ping', 'search']]
+    assert manager.embed_documents(['search', 'add numbers']) == [[6.0], [11.0]]
+    assert len(manager.embedder.requests) == 2
+
+
+def test_embed_documents_batches_uncached_texts(manager, monkeypatch):
+    monkeypatch.setattr(retriever_manager, 'EMBEDDING_BATCH_SIZE', 2)
+    manager.embed_query('b')
+
+    vectors = manager.embed_documents(['a', 'b', 'cc', 'ddd', 'eeee'])
+
+    assert vectors == [[1.0], [1.0], [2.0], [3.0], [4.0]]
+    assert manager.embedder.requests == [['b'], ['a', 'cc'], ['ddd', 'eeee']]
+
+
+def test_embed_query_reuses_recent_vectors(manager, monkeypatch):
+    monkeypatch.setattr(retriever_manager, 'EMBEDDING_CACHE_SIZE', 2)
+
+    first = manager.embed_query('a')
+    assert manager.embed_query('a') is first
+    manager.embed_query('bb')
+    # 'a' was used last, so 'bb' is evicted by 'ccc'
+    manager.embed_query('a')
+    manager.embed_query('ccc')
+    manager.embed_query('a')
+    manager.embed_query('bb')
+
+    assert manager.embedder.requests == [['a'], ['bb'], ['ccc'], ['bb']]
+
+
+def test_disk_cache_is_shared_between_managers(monkeypatch, tmp_path):
+    pytest.importorskip('diskcache')
+    monkeypatch.setattr(retriever_manager, 'OpenAIEmbeddings', FakeEmbeddings)
+    monkeypatch.setattr(retriever_manager, 'HybridCypherRetriever', lambda **kwargs: None)
+
+    def make(model):
+        return RetrieverManager(FakeNeo4jManager(), {'base_url': None, 'api_key': None, 'model': model,
+                                                     'cache_dir': str(tmp_path)})
+
+    make('test').embed_documents(['a', 'bb'])
+    second = make('test')
+    assert second.embed_query('a') == [1.0]
+    assert second.embed_documents(['bb']) == [[2.0]]
+    assert second.embedder.requests == []
+
+    # Vectors of another model are not reused
+    other = make('other')
+    other.embed_query('a')
+    assert other.embedder.requests == [['a']]
@@ -0,0 +1,359 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from aflow.models import task_manager
+from aflow.models.task_manager import AsyncTaskManager, TaskManager
+
+
+class FakeNeo4jManager:
+    """Answers the execute_task query with a fixed task and records writes"""
+
+    def __init__(self, task=None, tools=None):
+        self.record = {'task': task, 'tools': tools}
+
+    def run_read(self, query, **params):
+        return [self.record]
+
+
+class FakeToolManager:
+    def __init__(self, functions):
+        self.functions = {function.__name__: function for function in functions}
+        self.loaded = []
+
+    def load_tool_function(self, name, category):
+        self.loaded.append((category, name))
+        return self.functions[name]
+
+
+def make_manager(functions, input_params=(), output_params=(), tool_outputs=None):
+    """Create a TaskManager whose only task runs the given tool functions in order"""
+    # 工具函数按(category, name)缓存在类属性中，每个管理器使用独立的分类
+    category = f'tests.{uuid.uuid4().hex}'
+    tool_outputs = tool_outputs or {}
+    tools = [{'name': function.__name__, 'category': category,
+              'outputs': tool_outputs.get(function.__name__)} for function in functions]
+    task = {'input_params': list(input_params), 'output_params': list(output_params)}
+    return TaskManager(FakeNeo4jManager(task, tools), None, FakeToolManager(functions))
+
+
+def test_missing_task_input_is_rejected_before_loading_tools():
+    def fetch(city):
+        return city
+
+    manager = make_manager([fetch], input_params=['city'])
+
+    with pytest.raises(ValueError, match='city'):
+        manager.execute_task('weather', {})
+    assert manager.tool_manager.loaded == []
+
+
+def test_unavailable_tool_parameter_fails_before_any_tool_runs():
+    calls = []
+
+    def fetch(city) -> int:
+        calls.append(city)
+        return 1
+
+    def summarize(raw):
+        return raw
+
+    manager = make_manager([fetch, summarize])
+
+    with pytest.raises(RuntimeError, match="Missing required parameters for tool 'summarize': raw"):
+        manager.execute_task('weather', {'city': 'Paris'})
+    assert calls == []
+
+
+def test_dict_result_of_named_tool_feeds_later_tools():
+    def fetch(city):
+        return {'raw': f'weather:{city}'}
+
+    # A string annotation names a non-dict result, but the tool may still return a dict
+    fetch.__annotations__['return'] = 'weather'
+
+    def summarize(raw):
+        return raw.upper()
+
+    manager = make_manager([fetch, summarize], output_params=['summarize'])
+
+    result = manager.execute_task('weather', {'city': 'Paris'})
+
+    assert result['outputs'] == {'summarize': 'WEATHER:PARIS'}
+
+
+def weather_tools():
+    def fetch(city) -> dict:
+        return {'raw': f'weather:{city}'}
+
+    def translate(city, language='en') -> str:
+        """Translate a city name
+
+        Returns:
+            translated_city: City name in the requested language
+        """
+        return f'{city}/{language}'
+
+    def summarize(raw, translated_city) -> str:
+        return f'{translated_city} {raw}'
+
+    def shout(summarize, suffix='!') -> dict:
+        return {'summary': summarize.upper() + suffix, 'ignored': True}
+
+    return [fetch, translate, summarize, shout]
+
+
+@pytest.mark.parametrize('context', [{'city': 'Paris'}, {'city': 'Paris', 'language': 'fr', 'suffix': '?'}])
+def test_concurrent_execution_matches_sequential(context):
+    outputs = {'fetch': ['raw'], 'shout': ['summary']}
+    sequential = make_manager(weather_tools(), ['city'], ['summary'], outputs).execute_task('weather', dict(context))
+    concurrent = make_manager(weather_tools(), ['city'], ['summary'], outputs).execute_task(
+        'weather', dict(context), concurrent=True)
+
+    assert concurrent == sequential
+    assert list(concurrent['results']) == ['fetch', 'translate', 'summarize', 'shout']
+
+
+def test_independent_tools_run_in_parallel():
+    # Both tools only return once the other one is running too
+    barrier = threading.Barrier(2, timeout=5)
+
+    def forecast(city) -> str:
+        barrier.wait()
+        return f'sunny in {city}'
+
+    def population(city) -> int:
+        barrier.wait()
+        return len(city)
+
+    manager = make_manager([forecast, population], output_params=['forecast', 'population'])
+
+    result = manager.execute_task('city', {'city': 'Oslo'}, concurrent=True)
+
+    assert result['outputs'] == {'forecast': 'sunny in Oslo', 'population': 4}
+
+
+def test_tool_reading_an_optional_result_of_the_batch_waits_for_it():
+    def first(city) -> str:
+        return 'first'
+
+    def second(city, first='default') -> str:
+        return f'{city}:{first}'
+
+    def run(concurrent):
+        manager = make_manager([first, second], output_params=['second'])
+        return manager.execute_task('chain', {'city': 'Rome'}, concurrent=concurrent)['outputs']
+
+    assert run(concurrent=True) == run(concurrent=False) == {'second': 'Rome:first'}
+
+
+def test_tools_after_an_undeclared_dict_result_are_not_batched():
+    def fetch(city):
+        return {'city': city.upper()}
+
+    def echo(city) -> str:
+        return city
+
+    manager = make_manager([fetch, echo], output_params=['echo'])
+
+    assert manager.execute_task('echo', {'city': 'Rome'}, concurrent=True)['outputs'] == {'echo': 'ROME'}
+
+
+def test_async_iter_tasks_streams_and_closes_early():
+    fetched = []
+    closed = threading.Event()
+
+    class StreamingTaskManager:
+        def iter_tasks(self, include_embedding=False):
+            try:
+                for name in ('a', 'b', 'c'):
+                    fetched.append(name)
+                    yield {'name': name, 'embedding': [0.0] if include_embedding else None}
+            finally:
+                closed.set()
+
+    async def first_two():
+        tasks = []
+        async for task in AsyncTaskManager(StreamingTaskManager()).iter_tasks(include_embedding=True):
+            tasks.append(task)
+            if len(tasks) == 2:
+                break
+        return tasks
+
+    tasks = asyncio.run(first_two())
+
+    assert [task['name'] for task in tasks] == ['a', 'b']
+    assert tasks[0]['embedding'] == [0.0]
+    assert fetched == ['a', 'b']
+    assert closed.is_set()
+
+
+class BulkNeo4jManager:
+    """Answers the bulk task probe and write as if the given tasks existed"""
+
+    def __init__(self, existing=()):
+        self.existing = {task['name']: task for task in existing}
+        self.writes = []
+
+    def run_read(self, query, rows, **params):
+        return [{'name': row['name'], 'task': self.existing.get(row['name']), 'missing_tools': []}
+                for row in rows]
+
+    def run_write(self, query, rows, **params):
+        self.writes.append(rows)
+        return [{'task': {'name': row['name'], 'description': row['description']}} for row in rows]
+
+
+class FakeRetrieverManager:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return [float(len(text))]
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+
+def test_create_tasks_bulk_returns_one_entry_per_input(caplog):
+    existing = {'name': 'report', 'description': 'Existing report'}
+    manager = TaskManager(BulkNeo4jManager([existing]), FakeRetrieverManager(), None)
+
+    tasks = manager.create_tasks_bulk([
+        {'name': 'weather', 'description': 'Weather', 'tool_names': ['fetch']},
+        {'name': 'report', 'description': 'Report', 'tool_names': ['fetch']},
+        {'name': 'weather', 'description': 'Weather again', 'tool_names': ['fetch']},
+    ])
+
+    assert tasks == [{'name': 'weather', 'description': 'Weather'}, existing,
+                     {'name': 'weather', 'description': 'Weather'}]
+    assert [[row['name'] for row in rows] for rows in manager.neo4j_manager.writes] == [['weather']]
+    assert manager.neo4j_manager.writes[0][0]['tool_entries'] == [{'name': 'fetch', 'order': 0, 'outputs': None}]
+    assert manager.retriever_manager.embedded == ['weather Weather']
+    assert "Task 'weather' is listed more than once" in caplog.text
+
+
+def test_only_declared_outputs_reach_the_context():
+    def fetch(city):
+        return {'raw': f'weather:{city}', 'debug': True}
+
+    def summarize(raw, debug=False):
+        return f'{raw} debug' if debug else raw
+
+    manager = make_manager([fetch, summarize], output_params=['summarize'], tool_outputs={'fetch': ['raw']})
+
+    result = manager.execute_task('weather', {'city': 'Oslo'})
+
+    assert result['outputs'] == {'summarize': 'weather:Oslo'}
+    assert 'debug' not in result['context_variables']
+    assert result['results']['fetch'] == {'raw': 'weather:Oslo', 'debug': True}
+
+
+def test_tool_functions_are_loaded_once_per_category_and_name():
+    def fetch(city) -> str:
+        return city.upper()
+
+    manager = make_manager([fetch], output_params=['fetch'])
+
+    manager.execute_task('weather', {'city': 'Rome'})
+    manager.execute_task('weather', {'city': 'Oslo'}, concurrent=True)
+    other = TaskManager(manager.neo4j_manager, None, manager.tool_manager)
+    assert other.execute_task('weather', {'city': 'Lima'})['outputs'] == {'fetch': 'LIMA'}
+
+    assert len(manager.tool_manager.loaded) == 1
+
+
+class ScriptedNeo4jManager:
+    """Answers each query with the records scripted for it and records the calls"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def run_read(self, query, **params):
+        self.calls.append((query, params))
+        return self.responses.get(query, [])
+
+    run_write = run_read
+
+
+def stored_task(description='Weather'):
+    return {'name': 'weather', 'description': description, 'input_params': ['city'], 'output_params': []}
+
+
+def test_update_task_writes_everything_in_one_query():
+    neo4j_manager = ScriptedNeo4jManager({
+        task_manager._CYPHER_UPDATE_TASK_PROBE: [{'task': stored_task(), 'missing_tools': []}],
+        task_manager._CYPHER_UPDATE_TASK: [{'task': stored_task('Weather report')}],
+    })
+    manager = TaskManager(neo4j_manager, FakeRetrieverManager(), None)
+
+    task = manager.update_task('weather', 'Weather report', ['fetch', 'summarize'],
+                               output_params=['summary'], tool_outputs={'fetch': ['raw']})
+
+    assert task == stored_task('Weather report')
+    assert [query for query, _ in neo4j_manager.calls] == \
+        [task_manager._CYPHER_UPDATE_TASK_PROBE, task_manager._CYPHER_UPDATE_TASK]
+    params = neo4j_manager.calls[1][1]
+    assert params['description'] == 'Weather report'
+    assert params['embedding'] == [float(len('weather Weather report'))]
+    assert params['tool_entries'] == [{'name': 'fetch', 'order': 0, 'outputs': ['raw']},
+                                      {'name': 'summarize', 'order': 1, 'outputs': None}]
+    assert (params['input_params'], params['output_params']) == (None, ['summary'])
+
+
+def test_update_task_rejects_missing_tools_before_writing():
+    neo4j_manager = ScriptedNeo4jManager({
+        task_manager._CYPHER_UPDATE_TASK_PROBE: [{'task': stored_task(), 'missing_tools': ['nope']}],
+    })
+    manager = TaskManager(neo4j_manager, FakeRetrieverManager(), None)
+
+    with pytest.raises(ValueError, match='nope'):
+        manager.update_task('weather', tool_names=['nope'])
+    assert len(neo4j_manager.calls) == 1
+
+
+@pytest.mark.parametrize('description', [None, 'Weather'])
+def test_metadata_only_update_skips_the_embedding(description):
+    neo4j_manager = ScriptedNeo4jManager({
+        task_manager._CYPHER_UPDATE_TASK_PROBE: [{'task': stored_task(), 'missing_tools': []}],
+        task_manager._CYPHER_UPDATE_TASK: [{'task': stored_task()}],
+    })
+    retriever_manager = FakeRetrieverManager()
+    manager = TaskManager(neo4j_manager, retriever_manager, None)
+
+    manager.update_task('weather', description, input_params=['city', 'days'])
+
+    assert retriever_manager.embedded == []
+    params = neo4j_manager.calls[-1][1]
+    assert (params['description'], params['embedding'], params['tool_entries']) == (None, None, None)
+    assert params['input_params'] == ['city', 'days']
+
+
+def test_unchanged_update_sends_no_write():
+    neo4j_manager = ScriptedNeo4jManager({
+        task_manager._CYPHER_UPDATE_TASK_PROBE: [{'task': stored_task(), 'missing_tools': []}],
+    })
+    manager = TaskManager(neo4j_manager, FakeRetrieverManager(), None)
+
+    assert manager.update_task('weather', 'Weather') == stored_task()
+    assert [query for query, _ in neo4j_manager.calls] == [task_manager._CYPHER_UPDATE_TASK_PROBE]
+
+
+def test_delete_task_checks_usage_and_deletes_in_one_query():
+    neo4j_manager = ScriptedNeo4jManager({task_manager._CYPHER_DELETE_TASK: [{'uses': 0}]})
+
+    TaskManager(neo4j_manager, None, None).delete_task('weather')
+
+    assert neo4j_manager.calls == [(task_manager._CYPHER_DELETE_TASK, {'task_name': 'weather'})]
+
+
+def test_delete_task_used_by_a_workflow_is_refused():
+    neo4j_manager = ScriptedNeo4jManager({task_manager._CYPHER_DELETE_TASK: [{'uses': 2}]})
+
+    with pytest.raises(ValueError, match='used in one or more workflows'):
+        TaskManager(neo4j_manager, None, None).delete_task('weather')
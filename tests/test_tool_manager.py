@@ -0,0 +1,327 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+import pytest
+from watchdog.events import DirCreatedEvent, DirModifiedEvent, FileModifiedEvent, FileOpenedEvent
+
+from aflow.models import tool_manager
+from aflow.models.merkle_tree import MerkleTree, STATE_VERSION
+from aflow.models.tool_manager import DEFAULT_CATEGORY, ToolManager
+
+
+class RecordingToolManager(ToolManager):
+    """ToolManager that only records the scans its file watcher triggers"""
+
+    def __init__(self, tools_dir):
+        self.tools_dir = str(tools_dir)
+        self.calls = []
+
+    def scan_tools(self):
+        self.calls.append(('scan_tools',))
+
+    def scan_tool_file(self, file_path):
+        self.calls.append(('scan_tool_file', file_path))
+
+
+def feed(tmp_path, *events):
+    """Pass events to the file watcher and wait until their scans have run"""
+    manager = RecordingToolManager(tmp_path)
+    manager._setup_file_watcher()
+    handler = manager._file_handler
+    handler._scan_delay = 0.01
+    try:
+        for event in events:
+            handler.on_any_event(event)
+        for timer in list(handler._timers.values()):
+            timer.join()
+    finally:
+        manager.cleanup()
+    return manager.calls
+
+
+def test_file_save_only_rescans_the_file(tmp_path):
+    path = str(tmp_path / 'core' / 'calculator.py')
+
+    calls = feed(tmp_path,
+                 FileOpenedEvent(path),
+                 FileModifiedEvent(path),
+                 DirModifiedEvent(str(tmp_path / 'core')))
+
+    assert calls == [('scan_tool_file', path)]
+
+
+def test_directory_creation_rescans_everything(tmp_path):
+    calls = feed(tmp_path, DirCreatedEvent(str(tmp_path / 'api')))
+
+    assert calls == [('scan_tools',)]
+
+
+class FakeNeo4jManager:
+    """Keeps Tool and FileLeaf nodes in dicts and records the queries it is sent"""
+
+    def __init__(self):
+        self.queries = []
+        self.tools = {}
+        self.leaves = {}
+        self.failures = 0
+
+    @contextmanager
+    def session_scope(self):
+        yield
+
+    def run_read(self, query, **params):
+        self.queries.append((query, params))
+        if query is tool_manager._CYPHER_GET_TOOL_DESCRIPTIONS:
+            return [{'name': name, 'description': self.tools[name]['description']}
+                    for name in params['names'] if name in self.tools]
+        if query is tool_manager._CYPHER_CREATE_TOOLS_BULK_PROBE:
+            return [{'tool': self.tool_info(name)} for name in params['names'] if name in self.tools]
+        if query is tool_manager._CYPHER_LOAD_MERKLE_STATE:
+            return [{'hash_algorithm': STATE_VERSION, 'state': None, 'leaves': list(self.leaves.values())}]
+        return []
+
+    def run_write(self, query, **params):
+        self.queries.append((query, params))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('write failed')
+        if query in (tool_manager._CYPHER_UPSERT_TOOLS, tool_manager._CYPHER_CREATE_TOOLS_BULK):
+            for row in params['rows']:
+                stored = self.tools.get(row['name'], {})
+                self.tools[row['name']] = dict(row, embedding=row['embedding'] or stored.get('embedding'))
+            return [{'tool': self.tool_info(row['name'])} for row in params['rows']]
+        if query is tool_manager._CYPHER_REMOVE_TOOLS:
+            for name in params['names']:
+                self.tools.pop(name, None)
+        elif query is tool_manager._CYPHER_SAVE_MERKLE_LEAVES:
+            for path in params['removed']:
+                self.leaves.pop(path, None)
+            self.leaves.update((leaf['path'], leaf) for leaf in params['leaves'])
+        return []
+
+    def tool_info(self, name):
+        tool = self.tools[name]
+        return {'name': name, 'description': tool['description'], 'category': tool['category']}
+
+    def writes(self, query):
+        return [params for sent, params in self.queries if sent is query]
+
+
+class FakeRetrieverManager:
+    def __init__(self):
+        self.embedded = []
+        self.requests = 0
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        self.requests += 1
+        return [float(len(text))]
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        # Like RetrieverManager, nothing is requested for an empty list
+        self.requests += bool(texts)
+        return [[float(len(text))] for text in texts]
+
+
+def make_manager(tools_dir, neo4j_manager=None):
+    """Create a ToolManager on fakes without scanning or watching tools_dir"""
+    manager = ToolManager.__new__(ToolManager)
+    manager.neo4j_manager = neo4j_manager or FakeNeo4jManager()
+    manager.retriever_manager = FakeRetrieverManager()
+    manager.tools_dir = str(tools_dir)
+    manager._scan_lock = threading.RLock()
+    manager.merkle_tree = MerkleTree(manager.tools_dir, build=False)
+    manager._saved_leaves = None
+    manager._load_merkle_state()
+    manager.neo4j_manager.queries.clear()
+    return manager
+
+
+def write(root, rel_path, content):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    # 保证同一时间戳精度内的重写也能被mtime/size检查发现
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return str(path)
+
+
+@pytest.fixture
+def tools_dir(tmp_path):
+    write(tmp_path, 'core/calculator.py',
+          'def add(a, b):\n    """Add two numbers"""\n    return a + b\n\n'
+          'def sub(a, b):\n    """Subtract two numbers"""\n    return a - b\n')
+    write(tmp_path, 'api/weather.py', 'def forecast(city):\n    """Weather forecast"""\n    return city\n')
+    return tmp_path
+
+
+def test_category_paths(tmp_path):
+    manager = make_manager(tmp_path)
+
+    assert manager._category_paths('core.calculator') == \
+        (str(tmp_path / 'core'), str(tmp_path / 'core' / 'calculator.py'))
+    assert manager._category_paths('api.news.headlines') == \
+        (str(tmp_path / 'api' / 'news'), str(tmp_path / 'api' / 'news' / 'headlines.py'))
+    assert manager._category_paths(DEFAULT_CATEGORY) == \
+        (str(tmp_path), str(tmp_path / f'{DEFAULT_CATEGORY}.py'))
+    for category in ('', 'core.', '.calculator', 'core..calculator'):
+        with pytest.raises(ValueError):
+            manager._category_paths(category)
+
+
+def test_create_tools_bulk_validates_every_category_before_writing(tmp_path):
+    manager = make_manager(tmp_path)
+
+    with pytest.raises(ValueError, match='core.'):
+        manager.create_tools_bulk([
+            {'name': 'add', 'description': 'Add numbers', 'category': 'api.math'},
+            {'name': 'sub', 'description': 'Subtract numbers', 'category': 'core.'},
+        ])
+
+    assert manager.neo4j_manager.queries == []
+    assert not (tmp_path / 'api').exists()
+
+
+def test_load_tool_function_from_default_category(tmp_path):
+    (tmp_path / f'{DEFAULT_CATEGORY}.py').write_text('def ping():\n    return "pong"\n')
+    manager = make_manager(tmp_path)
+
+    try:
+        assert manager.load_tool_function('ping', DEFAULT_CATEGORY)() == 'pong'
+    finally:
+        # Tool modules are registered under their category name
+        sys.modules.pop(DEFAULT_CATEGORY, None)
+
+
+def test_create_tools_bulk_returns_one_entry_per_input(tmp_path, caplog):
+    manager = make_manager(tmp_path)
+
+    tools = manager.create_tools_bulk([
+        {'name': 'add', 'description': 'Add numbers', 'category': 'core.calculator'},
+        {'name': 'ping', 'description': 'Ping'},
+        {'name': 'add', 'description': 'Add numbers again', 'category': 'core.other'},
+    ])
+
+    assert [tool['name'] for tool in tools] == ['add', 'ping', 'add']
+    assert tools[2] == tools[0] == {'name': 'add', 'description': 'Add numbers', 'category': 'core.calculator'}
+    assert tools[1]['category'] == DEFAULT_CATEGORY
+    # One probe, one embeddings request and one write for the distinct tools
+    assert len(manager.neo4j_manager.queries) == 2
+    assert manager.retriever_manager.requests == 1
+    assert manager.retriever_manager.embedded == ['add Add numbers', 'ping Ping']
+    assert "Tool 'add' is listed more than once" in caplog.text
+
+
+def test_scan_writes_all_changed_tools_in_one_batch(tools_dir):
+    neo4j_manager = FakeNeo4jManager()
+    manager = make_manager(tools_dir, neo4j_manager)
+
+    manager.scan_tools()
+
+    upserts = neo4j_manager.writes(tool_manager._CYPHER_UPSERT_TOOLS)
+    assert len(upserts) == 1
+    assert sorted((row['name'], row['category']) for row in upserts[0]['rows']) == \
+        [('add', 'core.calculator'), ('forecast', 'api.weather'), ('sub', 'core.calculator')]
+    assert set(neo4j_manager.leaves) == set(manager.merkle_tree.get_file_nodes())
+
+    # A restarted manager only loads the saved leaves and finds nothing to write
+    make_manager(tools_dir, neo4j_manager).scan_tools()
+    assert not neo4j_manager.writes(tool_manager._CYPHER_UPSERT_TOOLS)
+    assert not neo4j_manager.writes(tool_manager._CYPHER_SAVE_MERKLE_LEAVES)
+
+
+def test_scan_removes_deleted_tools(tools_dir):
+    manager = make_manager(tools_dir)
+    manager.scan_tools()
+
+    write(tools_dir, 'core/calculator.py', 'def add(a, b):\n    """Add two numbers"""\n    return a + b\n')
+    os.remove(tools_dir / 'api' / 'weather.py')
+    manager.scan_tools()
+
+    assert set(manager.neo4j_manager.tools) == {'add'}
+    assert sorted(manager.neo4j_manager.writes(tool_manager._CYPHER_REMOVE_TOOLS)[0]['names']) == ['forecast', 'sub']
+
+
+def test_failed_tool_write_is_retried_on_the_next_scan(tools_dir):
+    neo4j_manager = FakeNeo4jManager()
+    manager = make_manager(tools_dir, neo4j_manager)
+    # The batch and the first row written on its own fail
+    neo4j_manager.failures = 2
+
+    manager.scan_tools()
+    assert len(neo4j_manager.tools) == 2
+    assert not neo4j_manager.leaves
+
+    manager.scan_tools()
+    assert set(neo4j_manager.tools) == {'add', 'sub', 'forecast'}
+    assert set(neo4j_manager.leaves) == set(manager.merkle_tree.get_file_nodes())
+
+
+def test_scan_looks_up_stored_descriptions_in_one_read(tools_dir):
+    neo4j_manager = FakeNeo4jManager()
+    manager = make_manager(tools_dir, neo4j_manager)
+
+    manager.scan_tools()
+
+    lookups = [params for query, params in neo4j_manager.queries
+               if query is tool_manager._CYPHER_GET_TOOL_DESCRIPTIONS]
+    assert len(lookups) == 1
+    assert sorted(lookups[0]['names']) == ['add', 'forecast', 'sub']
+
+
+def test_scan_embeds_only_new_and_changed_descriptions_in_one_request(tools_dir):
+    manager = make_manager(tools_dir)
+    retriever_manager = manager.retriever_manager
+
+    manager.scan_tools()
+    assert retriever_manager.requests == 1
+    assert sorted(retriever_manager.embedded) == \
+        ['add Add two numbers', 'forecast Weather forecast', 'sub Subtract two numbers']
+
+    # A new body with the same docstring keeps the stored vector
+    retriever_manager.embedded.clear()
+    write(tools_dir, 'api/weather.py', 'def forecast(city):\n    """Weather forecast"""\n    return city.title()\n')
+    manager.scan_tools()
+    assert retriever_manager.embedded == []
+    assert manager.neo4j_manager.tools['forecast']['embedding'] == [len('forecast Weather forecast')]
+
+    write(tools_dir, 'api/weather.py', 'def forecast(city):\n    """Forecast for a city"""\n    return city\n')
+    manager.scan_tools()
+    assert retriever_manager.embedded == ['forecast Forecast for a city']
+    assert retriever_manager.requests == 2
+
+
+def test_search_tools_queries_the_vector_index(tmp_path):
+    neo4j_manager = FakeNeo4jManager()
+    manager = make_manager(tmp_path, neo4j_manager)
+
+    manager.search_tools('add numbers', limit=3)
+
+    (query, params), = neo4j_manager.queries
+    assert query is tool_manager._CYPHER_SEARCH_TOOLS
+    assert "db.index.vector.queryNodes('toolEmbedding'" in query
+    assert params == {'embedding': [float(len('add numbers'))],
+                      'candidates': 3 * tool_manager.SEARCH_CANDIDATE_FACTOR,
+                      'query_text': 'add numbers', 'limit': 3}
+
+
+def test_scan_tool_file_writes_only_that_files_tools(tools_dir):
+    neo4j_manager = FakeNeo4jManager()
+    manager = make_manager(tools_dir, neo4j_manager)
+    manager.scan_tools()
+    neo4j_manager.queries.clear()
+
+    path = write(tools_dir, 'api/weather.py',
+                 'def forecast(city):\n    """Weather forecast"""\n    return city\n\n'
+                 'def alerts(city):\n    """Weather alerts"""\n    return []\n')
+    manager.scan_tool_file(path)
+
+    upserts = neo4j_manager.writes(tool_manager._CYPHER_UPSERT_TOOLS)
+    assert [[row['name'] for row in params['rows']] for params in upserts] == [['alerts']]
+    saved = neo4j_manager.writes(tool_manager._CYPHER_SAVE_MERKLE_LEAVES)
+    assert [[leaf['path'] for leaf in params['leaves']] for params in saved] == [[path]]
+    assert manager.merkle_tree.root.hash == MerkleTree(str(tools_dir)).root.hash